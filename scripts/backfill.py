@@ -18,6 +18,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from sqlalchemy import text
+from sqlalchemy.pool import NullPool
 from src.collectors.tonnel import TonnelCollector
 from src.collectors.fragment import FragmentCollector
 from src.storage.postgres import db
@@ -197,8 +198,8 @@ async def main():
 
     runner = BackfillRunner()
 
-    # Initialize database
-    await db.connect()
+    # Initialize database (one-off run: no pool to keep or pre-warm)
+    await db.connect(poolclass=NullPool)
 
     try:
         if args.source == "tonnel":
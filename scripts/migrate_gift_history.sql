@@ -21,13 +21,19 @@ CREATE TABLE IF NOT EXISTS nft_transfers (
 -- Indexes for nft_transfers
 CREATE INDEX IF NOT EXISTS ix_nft_transfers_tx_hash ON nft_transfers(tx_hash);
 CREATE INDEX IF NOT EXISTS ix_nft_transfers_nft_address ON nft_transfers(nft_address);
-CREATE INDEX IF NOT EXISTS ix_nft_transfers_collection_address ON nft_transfers(collection_address);
-CREATE INDEX IF NOT EXISTS ix_nft_transfers_from_address ON nft_transfers(from_address);
-CREATE INDEX IF NOT EXISTS ix_nft_transfers_to_address ON nft_transfers(to_address);
 CREATE INDEX IF NOT EXISTS ix_nft_transfers_block_timestamp ON nft_transfers(block_timestamp);
-CREATE INDEX IF NOT EXISTS ix_nft_transfers_is_telegram_gift ON nft_transfers(is_telegram_gift);
+CREATE INDEX IF NOT EXISTS ix_nft_transfers_tg_gift_partial ON nft_transfers(block_timestamp DESC) WHERE is_telegram_gift = TRUE;
 CREATE INDEX IF NOT EXISTS ix_nft_transfers_from_to ON nft_transfers(from_address, to_address);
 CREATE INDEX IF NOT EXISTS ix_nft_transfers_collection_time ON nft_transfers(collection_address, block_timestamp);
+CREATE INDEX IF NOT EXISTS ix_nft_transfers_from_time ON nft_transfers(from_address, block_timestamp DESC);
+CREATE INDEX IF NOT EXISTS ix_nft_transfers_to_time ON nft_transfers(to_address, block_timestamp DESC);
+
+-- Covered by the composite indexes above (same leftmost column)
+DROP INDEX IF EXISTS ix_nft_transfers_from_address;
+DROP INDEX IF EXISTS ix_nft_transfers_collection_address;
+DROP INDEX IF EXISTS ix_nft_transfers_to_address;
+-- Replaced by the partial ix_nft_transfers_tg_gift_partial
+DROP INDEX IF EXISTS ix_nft_transfers_is_telegram_gift;
 
 -- Table for mapping wallet addresses to Telegram usernames
 CREATE TABLE IF NOT EXISTS wallet_usernames (
@@ -43,10 +49,12 @@ CREATE TABLE IF NOT EXISTS wallet_usernames (
 
 -- Indexes for wallet_usernames
 CREATE INDEX IF NOT EXISTS ix_wallet_usernames_wallet_address ON wallet_usernames(wallet_address);
-CREATE INDEX IF NOT EXISTS ix_wallet_usernames_username ON wallet_usernames(username);
 CREATE INDEX IF NOT EXISTS ix_wallet_usernames_user_id ON wallet_usernames(user_id);
 CREATE INDEX IF NOT EXISTS ix_wallet_usernames_user ON wallet_usernames(username, user_id);
 
+-- Covered by ix_wallet_usernames_user
+DROP INDEX IF EXISTS ix_wallet_usernames_username;
+
 -- Table for caching Fragment gift NFT metadata
 CREATE TABLE IF NOT EXISTS gift_metadata_cache (
     id SERIAL PRIMARY KEY,
@@ -6,6 +6,7 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from src.api.routes import deals, analytics, watchlist, websocket
 from src.api.auth import get_current_user
+from src.storage.db_pool import get_db_pool_stats
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,7 +32,11 @@ app.add_middleware(
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "ok", "service": "ton-gifts-terminal-api"}
+    return {
+        "status": "ok",
+        "service": "ton-gifts-terminal-api",
+        "db_pool": get_db_pool_stats(),
+    }
 
 
 # Include routers
@@ -11,6 +11,9 @@ from src.core.models import MarketEvent, EventType, EventSource
 
 logger = logging.getLogger(__name__)
 
+# nanoTON -> TON divisor
+_NANO = Decimal(10) ** 9
+
 
 # TON Gift NFT Collection addresses (raw format 0:...)
 # Extracted from gift-minter.ton transaction history
@@ -280,7 +283,7 @@ class TonApiCollector:
                 price_nano = value_data
 
             # Convert from nanoTON to TON
-            price = Decimal(str(price_nano)) / Decimal("1000000000")
+            price = Decimal(price_nano) / _NANO
 
             # Skip zero-price transfers (not sales)
             if price <= 0:
@@ -361,7 +364,7 @@ class TonApiCollector:
             # Get price
             amount = purchase.get("amount", {})
             price_nano = amount.get("value", 0) if isinstance(amount, dict) else int(amount or 0)
-            price = Decimal(str(price_nano)) / Decimal("1000000000")
+            price = Decimal(price_nano) / _NANO
 
             if price <= 0:
                 return None
@@ -14,6 +14,10 @@ class Settings(BaseSettings):
     POSTGRES_USER: str = "postgres"
     POSTGRES_PASSWORD: str = "postgres"
     POSTGRES_DB: str = "ton_gifts"
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PREWARM: int = 5  # connections opened at startup
 
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
@@ -184,6 +184,29 @@ class ActiveListing(BaseModel):
         """Check if black pack."""
         return self.backdrop in BLACK_PACK_BACKGROUNDS
 
+    @classmethod
+    def from_row(cls, row) -> "ActiveListing":
+        """
+        Build from a trusted active_listings row without validation.
+
+        Row order: gift_id, gift_name, model, backdrop, pattern, number,
+        price, listed_at, export_at, source, raw_data, last_updated.
+        """
+        return cls.model_construct(
+            gift_id=row[0],
+            gift_name=row[1],
+            model=row[2],
+            backdrop=row[3],
+            pattern=row[4],
+            number=row[5],
+            price=row[6],
+            listed_at=row[7],
+            export_at=row[8],
+            source=EventSource(row[9]),
+            raw_data=row[10],
+            last_updated=row[11],
+        )
+
     @field_validator("price", mode="before")
     @classmethod
     def validate_decimal(cls, v):
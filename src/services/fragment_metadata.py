@@ -4,8 +4,10 @@ Fetches and parses metadata for Telegram gift NFTs from Fragment.
 URL pattern: https://nft.fragment.com/gift/[giftname]-[id].json
 """
 
+import time
 import logging
 import aiohttp
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional
@@ -16,6 +18,9 @@ logger = logging.getLogger(__name__)
 # Fragment NFT metadata base URL
 FRAGMENT_NFT_BASE = "https://nft.fragment.com/gift"
 
+# Max slugs kept in the in-process metadata cache (least recently used go first)
+CACHE_MAX_ENTRIES = 50_000
+
 
 @dataclass
 class GiftAttribute:
@@ -95,7 +100,8 @@ class FragmentMetadataService:
 
     def __init__(self):
         self._session: Optional[aiohttp.ClientSession] = None
-        self._cache: dict[str, tuple[FragmentGiftMetadata, float]] = {}
+        # slug -> (metadata or None for a 404, fetched_at), in LRU order
+        self._cache: OrderedDict[str, tuple[Optional[FragmentGiftMetadata], float]] = OrderedDict()
         self._cache_ttl = 3600  # 1 hour cache
 
     async def _get_session(self) -> aiohttp.ClientSession:
@@ -119,14 +125,15 @@ class FragmentMetadataService:
         Returns:
             FragmentGiftMetadata or None if not found
         """
-        import time
-
         # Check cache
-        if slug in self._cache:
-            metadata, timestamp = self._cache[slug]
+        cached = self._cache.get(slug)
+        if cached is not None:
+            metadata, timestamp = cached
             if time.time() - timestamp < self._cache_ttl:
+                self._cache.move_to_end(slug)
                 logger.debug(f"Fragment metadata cache hit for {slug}")
                 return metadata
+            del self._cache[slug]
 
         try:
             session = await self._get_session()
@@ -138,6 +145,8 @@ class FragmentMetadataService:
             async with session.get(url, timeout=10) as resp:
                 if resp.status == 404:
                     logger.debug(f"Fragment metadata not found for {slug}")
+                    # Remember misses too, so unknown slugs aren't re-requested every cycle
+                    self._cache_put(slug, None)
                     return None
 
                 if resp.status != 200:
@@ -150,7 +159,7 @@ class FragmentMetadataService:
             metadata = self._parse_metadata(slug, data)
 
             # Cache result
-            self._cache[slug] = (metadata, time.time())
+            self._cache_put(slug, metadata)
 
             logger.info(f"Fragment metadata for {slug}: model={metadata.model}, backdrop={metadata.backdrop}")
 
@@ -160,6 +169,13 @@ class FragmentMetadataService:
             logger.error(f"Failed to fetch Fragment metadata for {slug}: {e}")
             return None
 
+    def _cache_put(self, slug: str, metadata: Optional[FragmentGiftMetadata]):
+        """Cache a lookup result, evicting the least recently used slugs."""
+        self._cache[slug] = (metadata, time.time())
+        self._cache.move_to_end(slug)
+        while len(self._cache) > CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
+
     def _parse_metadata(self, slug: str, data: dict) -> FragmentGiftMetadata:
         """Parse raw JSON into FragmentGiftMetadata."""
 
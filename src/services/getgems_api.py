@@ -15,6 +15,9 @@ logger = logging.getLogger(__name__)
 
 GETGEMS_GRAPHQL_URL = "https://api.getgems.io/graphql"
 
+# nanoTON -> TON divisor
+_NANO = Decimal(10) ** 9
+
 # Known Telegram Gifts collection addresses
 TELEGRAM_GIFT_COLLECTIONS = {
     "EQCE80Aln8YfldnQLwWMvOfloLGgmPY0eGDJz9ufG3gRui3D": "Loot Bags",
@@ -148,7 +151,7 @@ class GetGemsService:
 
         floor_price = None
         if col.get("floorPriceNano"):
-            floor_price = Decimal(str(int(col["floorPriceNano"]))) / Decimal("1000000000")
+            floor_price = Decimal(int(col["floorPriceNano"])) / _NANO
 
         cover_url = None
         if col.get("cover", {}).get("image", {}).get("originalUrl"):
@@ -205,7 +208,7 @@ class GetGemsService:
 
         sale_price = None
         if nft.get("sale", {}).get("fullPrice"):
-            sale_price = Decimal(str(nft["sale"]["fullPrice"])) / Decimal("1000000000")
+            sale_price = Decimal(str(nft["sale"]["fullPrice"])) / _NANO
 
         image_url = None
         if nft.get("content", {}).get("image", {}).get("originalUrl"):
@@ -284,7 +287,7 @@ class GetGemsService:
         for nft in items:
             sale_price = None
             if nft.get("sale", {}).get("fullPrice"):
-                sale_price = Decimal(str(nft["sale"]["fullPrice"])) / Decimal("1000000000")
+                sale_price = Decimal(str(nft["sale"]["fullPrice"])) / _NANO
 
             image_url = None
             if nft.get("content", {}).get("image", {}).get("originalUrl"):
@@ -345,7 +348,7 @@ class GetGemsService:
         for nft in items:
             sale_price = None
             if nft.get("sale", {}).get("fullPrice"):
-                sale_price = Decimal(str(nft["sale"]["fullPrice"])) / Decimal("1000000000")
+                sale_price = Decimal(str(nft["sale"]["fullPrice"])) / _NANO
 
             image_url = None
             if nft.get("content", {}).get("image", {}).get("originalUrl"):
@@ -25,6 +25,7 @@ from src.services.wallet_resolver import wallet_resolver, WalletMatch
 from src.services.giftasset_api import get_giftasset_api, GiftAssetGift, UserGiftSummary
 from src.storage.postgres import db
 from src.storage.gift_history import GiftHistoryService
+from src.storage.redis_client import redis_client
 
 logger = logging.getLogger(__name__)
 
@@ -590,7 +591,7 @@ class OSINTService:
             recipients = {}
             try:
                 if db.session_factory:
-                    gift_history = GiftHistoryService(db.session_factory)
+                    gift_history = GiftHistoryService(db.session_factory, redis_client)
                     logger.info(f"OSINT: Searching sent gifts for user_id={profile.user_id}, username={profile.username}")
 
                     # Get gifts sent by this user from cached metadata
@@ -605,17 +606,17 @@ class OSINTService:
                     # Convert to SentGiftInfo and group by recipient
                     for cached in cached_gifts:
                         sent_gift = SentGiftInfo(
-                            recipient_username=cached.recipient_username,
+                            recipient_username=cached["recipient_username"],
                             recipient_name=None,  # Not stored
-                            recipient_id=cached.recipient_id,
-                            gift_name=cached.name or "",
+                            recipient_id=cached["recipient_id"],
+                            gift_name=cached["name"] or "",
                             stars_value=0,  # Not stored yet
-                            date=cached.transfer_date
+                            date=cached["transfer_date"]
                         )
                         gifts_sent.append(sent_gift)
 
                         # Group by recipient
-                        recipient_key = cached.recipient_username or str(cached.recipient_id) or "unknown"
+                        recipient_key = cached["recipient_username"] or str(cached["recipient_id"]) or "unknown"
                         if recipient_key not in recipients:
                             recipients[recipient_key] = []
                         recipients[recipient_key].append(sent_gift)
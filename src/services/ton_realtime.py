@@ -14,6 +14,7 @@ from typing import Optional, Callable, Awaitable
 from decimal import Decimal
 
 import aiohttp
+from yarl import URL
 
 logger = logging.getLogger(__name__)
 
@@ -21,9 +22,21 @@ logger = logging.getLogger(__name__)
 TONAPI_SSE_URL = "https://tonapi.io/v2/sse"
 TONAPI_WEBHOOKS_URL = "https://rt.tonapi.io/webhooks"
 
+# Pre-parsed URLs so requests don't re-parse the same base per call
+_TONAPI = URL("https://tonapi.io/v2")
+_SSE_TRANSACTIONS_URL = URL(TONAPI_SSE_URL) / "accounts" / "transactions"
+
+# Bound every TonAPI call; the SSE stream has no total limit but a stuck read
+# is detected after sock_read seconds and triggers a reconnect
+_DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=5, connect=2)
+_SSE_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_read=60)
+
 # NFT Transfer opcode (TEP-62)
 NFT_TRANSFER_OPCODE = "0x5fcc3d14"
 
+# nanoTON -> TON divisor
+_NANO = Decimal(10) ** 9
+
 # Telegram Gift collection addresses
 TELEGRAM_GIFT_COLLECTIONS = {
     "EQCE80Aln8YfldnQLwWMvOfloLGgmPY0eGDJz9ufG3gRui3D",  # Loot Bags
@@ -31,6 +44,9 @@ TELEGRAM_GIFT_COLLECTIONS = {
     "EQCA14o1-VWhS2efqoh_9M1b_A9DtKTuoqfmkn83AbJzwnPi",  # Star Gifts
 }
 
+# Shared default for nested .get() lookups on API payloads (never mutated)
+_EMPTY: dict = {}
+
 
 @dataclass
 class NFTTransferEvent:
@@ -46,6 +62,45 @@ class NFTTransferEvent:
     price_ton: Optional[Decimal] = None  # If it was a sale
     is_telegram_gift: bool = False
 
+    @classmethod
+    def from_transfer(
+        cls,
+        nft_address: str,
+        from_address: str,
+        to_address: str,
+        timestamp: datetime,
+        tx_hash: str,
+        collection_address: str,
+        collection_name: Optional[str],
+        nft_name: Optional[str],
+    ) -> "NFTTransferEvent":
+        """Build an event for a plain NFT transfer (no price)."""
+        return cls(
+            nft_address, from_address, to_address, timestamp, tx_hash,
+            collection_address, collection_name, nft_name, None,
+            collection_address in TELEGRAM_GIFT_COLLECTIONS,
+        )
+
+    @classmethod
+    def from_purchase(
+        cls,
+        nft_address: str,
+        from_address: str,
+        to_address: str,
+        timestamp: datetime,
+        tx_hash: str,
+        collection_address: str,
+        collection_name: Optional[str],
+        nft_name: Optional[str],
+        price_ton: Decimal,
+    ) -> "NFTTransferEvent":
+        """Build an event for an NFT sale."""
+        return cls(
+            nft_address, from_address, to_address, timestamp, tx_hash,
+            collection_address, collection_name, nft_name, price_ton,
+            collection_address in TELEGRAM_GIFT_COLLECTIONS,
+        )
+
 
 # Type alias for event handler
 EventHandler = Callable[[NFTTransferEvent], Awaitable[None]]
@@ -153,7 +208,7 @@ class TonRealtimeTracker:
         session = await self._get_session()
 
         # Build SSE URL for account transactions with NFT transfer opcode filter
-        url = f"{TONAPI_SSE_URL}/accounts/transactions"
+        url = _SSE_TRANSACTIONS_URL
         params = {
             "accounts": ",".join(accounts),
             "operations": NFT_TRANSFER_OPCODE
@@ -161,7 +216,7 @@ class TonRealtimeTracker:
 
         logger.info(f"Connecting to SSE: {url}")
 
-        async with session.get(url, params=params, timeout=None) as resp:
+        async with session.get(url, params=params, timeout=_SSE_TIMEOUT) as resp:
             if resp.status != 200:
                 raise Exception(f"SSE connection failed: {resp.status}")
 
@@ -220,10 +275,11 @@ class TonRealtimeTracker:
             session = await self._get_session()
 
             # Get NFT history for this account around this transaction
-            url = f"https://tonapi.io/v2/accounts/{account_id}/nfts/history"
-            params = {"limit": 1, "before_lt": lt + 1}
+            url = (_TONAPI / "accounts" / account_id / "nfts" / "history").with_query(
+                limit=1, before_lt=lt + 1
+            )
 
-            async with session.get(url, params=params) as resp:
+            async with session.get(url, timeout=_DEFAULT_TIMEOUT) as resp:
                 if resp.status != 200:
                     return None
 
@@ -240,48 +296,46 @@ class TonRealtimeTracker:
                     action_type = action.get("type", "")
 
                     if action_type == "NftItemTransfer":
-                        transfer = action.get("NftItemTransfer", {})
-                        nft = transfer.get("nft", {})
+                        transfer = action.get("NftItemTransfer", _EMPTY)
+                        nft = transfer.get("nft", _EMPTY)
 
                         nft_address = nft.get("address", "")
-                        collection = nft.get("collection", {})
+                        collection = nft.get("collection", _EMPTY)
                         collection_addr = collection.get("address", "")
 
-                        return NFTTransferEvent(
-                            nft_address=nft_address,
-                            from_address=transfer.get("sender", {}).get("address", ""),
-                            to_address=transfer.get("recipient", {}).get("address", ""),
-                            timestamp=datetime.fromtimestamp(event.get("timestamp", 0)),
-                            tx_hash=tx_hash,
-                            collection_address=collection_addr,
-                            collection_name=collection.get("name"),
-                            nft_name=nft.get("metadata", {}).get("name"),
-                            is_telegram_gift=collection_addr in TELEGRAM_GIFT_COLLECTIONS
+                        return NFTTransferEvent.from_transfer(
+                            nft_address,
+                            transfer.get("sender", _EMPTY).get("address", ""),
+                            transfer.get("recipient", _EMPTY).get("address", ""),
+                            datetime.fromtimestamp(event.get("timestamp", 0)),
+                            tx_hash,
+                            collection_addr,
+                            collection.get("name"),
+                            nft.get("metadata", _EMPTY).get("name"),
                         )
 
                     elif action_type == "NftPurchase":
-                        purchase = action.get("NftPurchase", {})
-                        nft = purchase.get("nft", {})
-                        amount = purchase.get("amount", {})
+                        purchase = action.get("NftPurchase", _EMPTY)
+                        nft = purchase.get("nft", _EMPTY)
+                        amount = purchase.get("amount", _EMPTY)
 
                         nft_address = nft.get("address", "")
-                        collection = nft.get("collection", {})
+                        collection = nft.get("collection", _EMPTY)
                         collection_addr = collection.get("address", "")
 
                         price_nano = int(amount.get("value", 0))
-                        price_ton = Decimal(str(price_nano)) / Decimal("1000000000")
-
-                        return NFTTransferEvent(
-                            nft_address=nft_address,
-                            from_address=purchase.get("seller", {}).get("address", ""),
-                            to_address=purchase.get("buyer", {}).get("address", ""),
-                            timestamp=datetime.fromtimestamp(event.get("timestamp", 0)),
-                            tx_hash=tx_hash,
-                            collection_address=collection_addr,
-                            collection_name=collection.get("name"),
-                            nft_name=nft.get("metadata", {}).get("name"),
-                            price_ton=price_ton,
-                            is_telegram_gift=collection_addr in TELEGRAM_GIFT_COLLECTIONS
+                        price_ton = Decimal(price_nano) / _NANO
+
+                        return NFTTransferEvent.from_purchase(
+                            nft_address,
+                            purchase.get("seller", _EMPTY).get("address", ""),
+                            purchase.get("buyer", _EMPTY).get("address", ""),
+                            datetime.fromtimestamp(event.get("timestamp", 0)),
+                            tx_hash,
+                            collection_addr,
+                            collection.get("name"),
+                            nft.get("metadata", _EMPTY).get("name"),
+                            price_ton,
                         )
 
         except Exception as e:
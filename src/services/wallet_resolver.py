@@ -8,16 +8,39 @@ Sources:
 """
 
 import os
+import time
 import logging
 from dataclasses import dataclass
 from typing import Optional
 import aiohttp
+from yarl import URL
 
 logger = logging.getLogger(__name__)
 
+# Pre-parsed TonAPI base; endpoints are built with yarl path joins
+_TONAPI = URL("https://tonapi.io/v2")
+
+# Per-request timeout so one slow TonAPI call can't stall resolve()
+_DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=5, connect=2)
+
 # Tonnel relayer addresses (used to detect trades)
 TONNEL_RELAYER = "EQDvzep8LkSIaHTv4q15y0dKQbkRYlbTXRWMjS5c4JJD3Sch"
 
+# Stop scanning Tonnel events after this many wallet matches
+TONNEL_MAX_MATCHES = 5
+
+# Telegram Gift collections searched for username metadata
+GIFT_COLLECTIONS = [
+    "EQAGcE-2lLyGHa-lsaP7S1gJlhfG6qFJ6MmkLU-xejbEFvIo",  # Telegram Gifts
+    "EQCA14o1-VWhS2efqoh_9M1b_A9DtKTuoqfmkn83AbJzwnPi",  # Star Gifts
+]
+
+# How long scanned collection items are reused between resolves (seconds)
+COLLECTION_ITEMS_TTL = 60
+
+# Statuses meaning TonAPI has no NFT search endpoint (others may be transient)
+NFT_SEARCH_UNSUPPORTED_STATUSES = (404, 405)
+
 # Known marketplace wallet patterns
 MARKETPLACE_WALLETS = {
     "tonnel": ["EQDvzep8LkSIaHTv4q15y0dKQbkRYlbTXRWMjS5c4JJD3Sch"],
@@ -25,6 +48,9 @@ MARKETPLACE_WALLETS = {
     "fragment": [],
 }
 
+# Shared default for nested .get() lookups on API payloads (never mutated)
+_EMPTY: dict = {}
+
 
 @dataclass
 class WalletMatch:
@@ -40,9 +66,14 @@ class WalletResolverService:
 
     def __init__(self):
         self.tonapi_key = os.getenv("TONAPI_KEY", "")
-        self.tonapi_base = "https://tonapi.io/v2"
+        self.tonapi_base = _TONAPI
         self._session: Optional[aiohttp.ClientSession] = None
 
+        # Server-side NFT search is disabled once TonAPI reports it missing (404/405)
+        self._nft_search_supported = True
+        # collection -> (fetched_at, items) for the client-side scan fallback
+        self._collection_items: dict[str, tuple[float, list[dict]]] = {}
+
     async def _get_session(self) -> aiohttp.ClientSession:
         """Get or create aiohttp session."""
         if self._session is None or self._session.closed:
@@ -98,19 +129,13 @@ class WalletResolverService:
             fragment_matches = await self._search_fragment_nfts(username, user_id)
             matches.extend(fragment_matches)
 
-        # Sort by confidence
+        # Sort by confidence and keep the best match per wallet address
         confidence_order = {"high": 0, "medium": 1, "low": 2}
-        matches.sort(key=lambda m: confidence_order.get(m.confidence, 3))
-
-        # Deduplicate by wallet address
-        seen = set()
-        unique_matches = []
-        for m in matches:
-            if m.wallet_address not in seen:
-                seen.add(m.wallet_address)
-                unique_matches.append(m)
+        best: dict[str, WalletMatch] = {}
+        for m in sorted(matches, key=lambda m: confidence_order.get(m.confidence, 3)):
+            best.setdefault(m.wallet_address, m)
 
-        return unique_matches
+        return list(best.values())
 
     async def _resolve_ton_dns(self, username: str) -> Optional[str]:
         """Resolve username via TON DNS."""
@@ -118,22 +143,22 @@ class WalletResolverService:
             session = await self._get_session()
 
             # Try .t.me domain first
-            url = f"{self.tonapi_base}/dns/{username}.t.me/resolve"
-            async with session.get(url) as resp:
+            url = self.tonapi_base / "dns" / f"{username}.t.me" / "resolve"
+            async with session.get(url, timeout=_DEFAULT_TIMEOUT) as resp:
                 if resp.status == 200:
                     data = await resp.json()
-                    wallet = data.get("wallet", {})
+                    wallet = data.get("wallet", _EMPTY)
                     address = wallet.get("address")
                     if address:
                         logger.info(f"TON DNS: {username}.t.me -> {address}")
                         return address
 
             # Try .ton domain
-            url = f"{self.tonapi_base}/dns/{username}.ton/resolve"
-            async with session.get(url) as resp:
+            url = self.tonapi_base / "dns" / f"{username}.ton" / "resolve"
+            async with session.get(url, timeout=_DEFAULT_TIMEOUT) as resp:
                 if resp.status == 200:
                     data = await resp.json()
-                    wallet = data.get("wallet", {})
+                    wallet = data.get("wallet", _EMPTY)
                     address = wallet.get("address")
                     if address:
                         logger.info(f"TON DNS: {username}.ton -> {address}")
@@ -156,15 +181,21 @@ class WalletResolverService:
         """
         matches = []
 
+        # Only comments can link a Tonnel trade to a user, so there is
+        # nothing to look for without a username
+        if not username:
+            return matches
+
+        needle = username.casefold()
+
         try:
             session = await self._get_session()
 
             # Search Tonnel relayer transactions for this username
             # Tonnel uses a specific format where username is encoded in transaction
-            url = f"{self.tonapi_base}/accounts/{TONNEL_RELAYER}/events"
-            params = {"limit": 100}
+            url = (self.tonapi_base / "accounts" / TONNEL_RELAYER / "events").with_query(limit=100)
 
-            async with session.get(url, params=params) as resp:
+            async with session.get(url, timeout=_DEFAULT_TIMEOUT) as resp:
                 if resp.status != 200:
                     return matches
 
@@ -173,15 +204,14 @@ class WalletResolverService:
 
                 for event in events:
                     # Look for NftItemTransfer or TonTransfer with comment
-                    actions = event.get("actions", [])
-                    for action in actions:
+                    for action in event.get("actions", ()):
                         # Check if there's a connection to our user
-                        comment = action.get("TonTransfer", {}).get("comment", "")
+                        comment = action.get("TonTransfer", _EMPTY).get("comment", "")
 
-                        if username and username.lower() in comment.lower():
+                        if needle in comment.casefold():
                             # Found potential match - extract sender/recipient wallet
-                            sender = action.get("TonTransfer", {}).get("sender", {}).get("address")
-                            recipient = action.get("TonTransfer", {}).get("recipient", {}).get("address")
+                            sender = action.get("TonTransfer", _EMPTY).get("sender", _EMPTY).get("address")
+                            recipient = action.get("TonTransfer", _EMPTY).get("recipient", _EMPTY).get("address")
 
                             # The user's wallet is likely the non-relayer one
                             user_wallet = sender if recipient == TONNEL_RELAYER else recipient
@@ -193,6 +223,9 @@ class WalletResolverService:
                                     confidence="medium",
                                     extra_info=comment[:50]
                                 ))
+                                # Stop scanning once we have enough candidates
+                                if len(matches) >= TONNEL_MAX_MATCHES:
+                                    return matches
 
         except Exception as e:
             logger.warning(f"Tonnel search failed: {e}")
@@ -224,48 +257,80 @@ class WalletResolverService:
             session = await self._get_session()
 
             # Search in Telegram Gift collections
-            gift_collections = [
-                "EQAGcE-2lLyGHa-lsaP7S1gJlhfG6qFJ6MmkLU-xejbEFvIo",  # Telegram Gifts
-                "EQCA14o1-VWhS2efqoh_9M1b_A9DtKTuoqfmkn83AbJzwnPi",  # Star Gifts
-            ]
-
-            for collection in gift_collections:
-                # Get recent NFT items from collection
-                url = f"{self.tonapi_base}/nfts/collections/{collection}/items"
-                params = {"limit": 50}
-
-                async with session.get(url, params=params) as resp:
-                    if resp.status != 200:
-                        continue
-
-                    data = await resp.json()
-                    items = data.get("nft_items", [])
-
-                    for item in items:
-                        metadata = item.get("metadata", {})
-                        attrs = metadata.get("attributes", [])
-
-                        # Look for sender/recipient in attributes
-                        for attr in attrs:
-                            trait = attr.get("trait_type", "").lower()
-                            value = str(attr.get("value", "")).lower()
-
-                            # Check if username matches
-                            if username and username.lower() in value:
-                                owner = item.get("owner", {}).get("address")
-                                if owner:
-                                    matches.append(WalletMatch(
-                                        wallet_address=owner,
-                                        source="fragment",
-                                        confidence="medium",
-                                        extra_info=f"NFT owner: {metadata.get('name', 'unknown')}"
-                                    ))
+            for collection in GIFT_COLLECTIONS:
+                items = await self._get_collection_items(session, collection, username)
+
+                for item in items:
+                    metadata = item.get("metadata", _EMPTY)
+                    attrs = metadata.get("attributes", [])
+
+                    # Look for sender/recipient in attributes
+                    for attr in attrs:
+                        trait = attr.get("trait_type", "").lower()
+                        value = str(attr.get("value", "")).lower()
+
+                        # Check if username matches
+                        if username and username.lower() in value:
+                            owner = item.get("owner", _EMPTY).get("address")
+                            if owner:
+                                matches.append(WalletMatch(
+                                    wallet_address=owner,
+                                    source="fragment",
+                                    confidence="medium",
+                                    extra_info=f"NFT owner: {metadata.get('name', 'unknown')}"
+                                ))
 
         except Exception as e:
             logger.warning(f"Fragment NFT search failed: {e}")
 
         return matches
 
+    async def _get_collection_items(
+        self,
+        session: aiohttp.ClientSession,
+        collection: str,
+        username: Optional[str]
+    ) -> list[dict]:
+        """
+        Get candidate NFT items from a gift collection.
+
+        Asks TonAPI to filter by username first; falls back to scanning the
+        latest collection items (cached for COLLECTION_ITEMS_TTL) when the
+        search endpoint is unavailable.
+        """
+        if username and self._nft_search_supported:
+            url = (self.tonapi_base / "nfts" / "search").with_query(
+                collection=collection, query=username, limit=10
+            )
+            async with session.get(url, timeout=_DEFAULT_TIMEOUT) as resp:
+                if resp.status == 200:
+                    data = await resp.json()
+                    return data.get("nft_items", [])
+                if resp.status in NFT_SEARCH_UNSUPPORTED_STATUSES:
+                    logger.info(f"TonAPI NFT search unavailable ({resp.status}), using collection scan")
+                    self._nft_search_supported = False
+                else:
+                    logger.debug(f"TonAPI NFT search failed ({resp.status}), using collection scan")
+
+        cached = self._collection_items.get(collection)
+        if cached and time.monotonic() - cached[0] < COLLECTION_ITEMS_TTL:
+            return cached[1]
+
+        # Get recent NFT items from collection
+        url = (
+            self.tonapi_base / "nfts" / "collections" / collection / "items"
+        ).with_query(limit=50)
+
+        async with session.get(url, timeout=_DEFAULT_TIMEOUT) as resp:
+            if resp.status != 200:
+                return []
+
+            data = await resp.json()
+            items = data.get("nft_items", [])
+
+        self._collection_items[collection] = (time.monotonic(), items)
+        return items
+
     async def get_best_wallet(
         self,
         username: Optional[str] = None,
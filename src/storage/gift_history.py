@@ -7,22 +7,74 @@ Stores:
 """
 
 import logging
-from datetime import datetime
+import time
+from itertools import islice
+from datetime import datetime, timedelta
 from decimal import Decimal
-from typing import Optional
+from typing import Any, Iterable, Iterator, Optional
 from dataclasses import dataclass
 
 from sqlalchemy import (
     Column, String, Integer, BigInteger, DateTime, Numeric,
-    Boolean, Text, Index, select, and_, or_
+    Boolean, Text, Index, select, delete, or_, func, any_, text, literal, tuple_, union_all
 )
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import declarative_base
 
+from src.storage.redis_client import RedisClient
+
 logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
+# Redis read-through cache for wallet <-> username lookups
+WALLET_CACHE_TTL = 3600
+WALLET_BY_USERNAME_KEY = "wallet:username:{}"
+WALLET_BY_ADDR_KEY = "wallet:by_addr:{}"
+
+# Redis marker set while a slug's cached gift metadata is still fresh
+GIFT_FRESH_KEY = "gift:{}"
+
+# In-process cache in front of Redis for wallet -> username lookups
+LOCAL_WALLET_CACHE_SIZE = 10_000
+LOCAL_WALLET_CACHE_TTL = 60
+
+# Rows per multi-row INSERT in bulk writes (well under Postgres' 32767 bind limit)
+BULK_CHUNK_SIZE = 500
+
+
+def _chunks(rows: Iterable[dict], size: int = BULK_CHUNK_SIZE) -> Iterator[list[dict]]:
+    """Split rows into lists of at most `size` items."""
+    it = iter(rows)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+# Columns written by bulk transfer ingest (COPY column order)
+TRANSFER_COPY_COLUMNS = (
+    "tx_hash", "nft_address", "nft_name", "collection_address", "collection_name",
+    "from_address", "to_address", "price_ton", "block_timestamp",
+    "is_telegram_gift", "is_sale",
+)
+
+
+def _transfer_values(row: dict) -> dict:
+    """Normalize a record_transfer()-style row to nft_transfers column values."""
+    return {
+        "tx_hash": row["tx_hash"],
+        "nft_address": row["nft_address"],
+        "nft_name": row.get("nft_name"),
+        "collection_address": row.get("collection_address"),
+        "collection_name": row.get("collection_name"),
+        "from_address": row["from_address"],
+        "to_address": row["to_address"],
+        "price_ton": row.get("price_ton"),
+        "block_timestamp": row["block_timestamp"],
+        "is_telegram_gift": row.get("is_telegram_gift", False),
+        "is_sale": row.get("price_ton") is not None,
+    }
+
 
 class NFTTransfer(Base):
     """NFT transfer event from blockchain."""
@@ -34,12 +86,12 @@ class NFTTransfer(Base):
     # NFT info
     nft_address = Column(String(66), nullable=False, index=True)
     nft_name = Column(String(255))
-    collection_address = Column(String(66), index=True)
+    collection_address = Column(String(66))  # indexed via ix_nft_transfers_collection_time
     collection_name = Column(String(255))
 
     # Transfer details
-    from_address = Column(String(66), nullable=False, index=True)
-    to_address = Column(String(66), nullable=False, index=True)
+    from_address = Column(String(66), nullable=False)  # indexed via ix_nft_transfers_from_to
+    to_address = Column(String(66), nullable=False)  # indexed via ix_nft_transfers_to_time
     price_ton = Column(Numeric(20, 9))  # Price if it was a sale
 
     # Timestamps
@@ -47,12 +99,19 @@ class NFTTransfer(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Flags
-    is_telegram_gift = Column(Boolean, default=False, index=True)
+    is_telegram_gift = Column(Boolean, default=False)
     is_sale = Column(Boolean, default=False)
 
     __table_args__ = (
         Index("ix_nft_transfers_from_to", "from_address", "to_address"),
         Index("ix_nft_transfers_collection_time", "collection_address", "block_timestamp"),
+        Index("ix_nft_transfers_from_time", from_address, block_timestamp.desc()),
+        Index("ix_nft_transfers_to_time", to_address, block_timestamp.desc()),
+        Index(
+            "ix_nft_transfers_tg_gift_partial",
+            block_timestamp.desc(),
+            postgresql_where=text("is_telegram_gift = TRUE"),
+        ),
     )
 
 
@@ -62,7 +121,7 @@ class WalletUsername(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     wallet_address = Column(String(66), unique=True, nullable=False, index=True)
-    username = Column(String(64), index=True)
+    username = Column(String(64))  # indexed via ix_wallet_usernames_user
     user_id = Column(BigInteger, index=True)
     user_name = Column(String(255))  # Full name
 
@@ -117,8 +176,100 @@ class GiftMetadataCache(Base):
 class GiftHistoryService:
     """Service for managing gift history in database."""
 
-    def __init__(self, session_factory):
+    def __init__(self, session_factory, redis: Optional[RedisClient] = None):
         self.session_factory = session_factory
+        self.redis = redis
+        # wallet_address -> (username info, cached_at)
+        self._wallet_cache: dict[str, tuple[dict, float]] = {}
+
+    def _local_wallet_get(self, wallet_address: str) -> Optional[dict]:
+        """Get username info from the in-process cache if still fresh."""
+        entry = self._wallet_cache.get(wallet_address)
+        if entry is None:
+            return None
+        info, cached_at = entry
+        if time.time() - cached_at >= LOCAL_WALLET_CACHE_TTL:
+            del self._wallet_cache[wallet_address]
+            return None
+        return info
+
+    def _local_wallet_set(self, wallet_address: str, info: dict):
+        """Store username info in the in-process cache, evicting the oldest entry when full."""
+        self._wallet_cache.pop(wallet_address, None)
+        if len(self._wallet_cache) >= LOCAL_WALLET_CACHE_SIZE:
+            del self._wallet_cache[next(iter(self._wallet_cache))]
+        self._wallet_cache[wallet_address] = (info, time.time())
+
+    async def _cache_get(self, key: str) -> Optional[Any]:
+        """Read a cached JSON value; cache errors count as a miss."""
+        if not self.redis:
+            return None
+        try:
+            return await self.redis.get_json(key)
+        except Exception as e:
+            logger.debug(f"Cache read failed for {key}: {e}")
+            return None
+
+    async def _cache_set(self, key: str, value: Any):
+        """Store a JSON value with the wallet cache TTL (best effort)."""
+        if not self.redis:
+            return
+        try:
+            await self.redis.set_json(key, value, ttl=WALLET_CACHE_TTL)
+        except Exception as e:
+            logger.debug(f"Cache write failed for {key}: {e}")
+
+    async def _cache_delete(self, *keys: str):
+        """Drop cached values (best effort)."""
+        if not self.redis:
+            return
+        for key in keys:
+            try:
+                await self.redis.delete(key)
+            except Exception as e:
+                logger.debug(f"Cache delete failed for {key}: {e}")
+
+    async def _mark_gifts_fresh(self, slugs: list[str], ttl_hours: int):
+        """Set Redis freshness markers that expire with the cached metadata (best effort)."""
+        if not self.redis or not slugs:
+            return
+        try:
+            await self.redis.mset_json(
+                {GIFT_FRESH_KEY.format(slug): 1 for slug in slugs},
+                ttl=ttl_hours * 3600,
+            )
+        except Exception as e:
+            logger.debug(f"Failed to mark gift metadata fresh: {e}")
+
+    async def is_gift_metadata_fresh(self, slug: str) -> bool:
+        """
+        Check whether cached metadata for a slug is still within its TTL.
+
+        Answered from Redis without touching Postgres. Without Redis every
+        slug counts as stale, so callers re-fetch from upstream.
+        """
+        if not self.redis:
+            return False
+        try:
+            return await self.redis.exists(GIFT_FRESH_KEY.format(slug))
+        except Exception as e:
+            logger.debug(f"Failed to check gift metadata freshness: {e}")
+            return False
+
+    async def purge_expired_gift_metadata(self) -> int:
+        """Delete cached gift metadata past its expires_at. Returns rows deleted."""
+        try:
+            async with self.session_factory() as session:
+                result = await session.execute(
+                    delete(GiftMetadataCache)
+                    .where(GiftMetadataCache.expires_at < datetime.utcnow())
+                )
+                await session.commit()
+                return result.rowcount or 0
+
+        except Exception as e:
+            logger.error(f"Failed to purge expired gift metadata: {e}")
+            return 0
 
     async def record_transfer(
         self,
@@ -140,30 +291,33 @@ class GiftHistoryService:
         """
         try:
             async with self.session_factory() as session:
-                # Check for duplicate
-                existing = await session.execute(
-                    select(NFTTransfer).where(NFTTransfer.tx_hash == tx_hash)
-                )
-                if existing.scalar_one_or_none():
-                    return False
-
-                transfer = NFTTransfer(
-                    tx_hash=tx_hash,
-                    nft_address=nft_address,
-                    nft_name=nft_name,
-                    collection_address=collection_address,
-                    collection_name=collection_name,
-                    from_address=from_address,
-                    to_address=to_address,
-                    price_ton=price_ton,
-                    block_timestamp=block_timestamp,
-                    is_telegram_gift=is_telegram_gift,
-                    is_sale=price_ton is not None
+                # Duplicates are rejected by the tx_hash unique constraint
+                stmt = (
+                    pg_insert(NFTTransfer)
+                    .values(
+                        tx_hash=tx_hash,
+                        nft_address=nft_address,
+                        nft_name=nft_name,
+                        collection_address=collection_address,
+                        collection_name=collection_name,
+                        from_address=from_address,
+                        to_address=to_address,
+                        price_ton=price_ton,
+                        block_timestamp=block_timestamp,
+                        is_telegram_gift=is_telegram_gift,
+                        is_sale=price_ton is not None
+                    )
+                    .on_conflict_do_nothing(index_elements=["tx_hash"])
+                    .returning(NFTTransfer.id)
                 )
 
-                session.add(transfer)
+                result = await session.execute(stmt)
+                inserted_id = result.scalar_one_or_none()
                 await session.commit()
 
+                if inserted_id is None:
+                    return False
+
                 logger.debug(f"Recorded transfer: {tx_hash[:16]}...")
                 return True
 
@@ -171,47 +325,167 @@ class GiftHistoryService:
             logger.error(f"Failed to record transfer: {e}")
             return False
 
+    async def record_transfers_bulk(self, rows: list[dict]) -> int:
+        """
+        Record many NFT transfers in one transaction.
+
+        Each row uses record_transfer()'s keyword names. Duplicates (by
+        tx_hash) are skipped.
+
+        Returns number of newly recorded transfers.
+        """
+        if not rows:
+            return 0
+
+        values = [_transfer_values(row) for row in rows]
+
+        try:
+            inserted = 0
+            async with self.session_factory() as session:
+                async with session.begin():
+                    for chunk in _chunks(values):
+                        result = await session.execute(
+                            pg_insert(NFTTransfer)
+                            .values(chunk)
+                            .on_conflict_do_nothing(index_elements=["tx_hash"])
+                            .returning(NFTTransfer.id)
+                        )
+                        inserted += len(result.all())
+
+            logger.debug(f"Recorded {inserted}/{len(rows)} transfers in bulk")
+            return inserted
+
+        except Exception as e:
+            logger.error(f"Failed to record transfers in bulk: {e}")
+            return 0
+
+    async def copy_transfers(self, rows: list[dict]) -> int:
+        """
+        Bulk-load NFT transfers with COPY, for large historical backfills.
+
+        Rows (record_transfer()'s keyword names) are de-duplicated by
+        tx_hash, streamed into a temporary staging table with COPY, then
+        merged with one INSERT ... SELECT ... ON CONFLICT DO NOTHING.
+
+        Returns number of newly recorded transfers.
+        """
+        if not rows:
+            return 0
+
+        unique = {row["tx_hash"]: row for row in rows}
+        records = [
+            tuple(values[col] for col in TRANSFER_COPY_COLUMNS)
+            for values in map(_transfer_values, unique.values())
+        ]
+        columns = ", ".join(TRANSFER_COPY_COLUMNS)
+
+        try:
+            async with self.session_factory() as session:
+                sa_conn = await session.connection()
+                raw_conn = await sa_conn.get_raw_connection()
+                conn = raw_conn.driver_connection
+
+                async with conn.transaction():
+                    await conn.execute(
+                        f"CREATE TEMP TABLE nft_transfers_stage ON COMMIT DROP AS "
+                        f"SELECT {columns} FROM nft_transfers WITH NO DATA"
+                    )
+                    await conn.copy_records_to_table(
+                        "nft_transfers_stage",
+                        records=records,
+                        columns=TRANSFER_COPY_COLUMNS,
+                    )
+                    status = await conn.execute(
+                        f"INSERT INTO nft_transfers ({columns}) "
+                        f"SELECT {columns} FROM nft_transfers_stage "
+                        f"ON CONFLICT (tx_hash) DO NOTHING"
+                    )
+
+            inserted = int(status.split()[-1])
+            logger.info(f"Copied {inserted}/{len(records)} transfers")
+            return inserted
+
+        except Exception as e:
+            logger.error(f"Failed to copy transfers: {e}")
+            return 0
+
     async def get_transfers_by_wallet(
         self,
         wallet_address: str,
         limit: int = 100,
         include_sent: bool = True,
         include_received: bool = True,
-        telegram_gifts_only: bool = False
-    ) -> list[NFTTransfer]:
-        """Get NFT transfers involving a wallet."""
+        telegram_gifts_only: bool = False,
+        before_ts: Optional[datetime] = None,
+        before_id: Optional[int] = None
+    ) -> tuple[list[dict], Optional[tuple[datetime, int]]]:
+        """
+        Get NFT transfers involving a wallet, newest first, as column dicts.
+
+        Pages with a (block_timestamp, id) keyset cursor, so transfers that
+        share a timestamp are never skipped between pages.
+
+        Returns:
+            (transfers, next_cursor). next_cursor is the (block_timestamp, id)
+            of the last transfer when the page is full, else None; pass it
+            back as before_ts/before_id to get the next page.
+        """
         try:
             async with self.session_factory() as session:
                 conditions = []
 
-                if include_sent and include_received:
+                if telegram_gifts_only:
+                    conditions.append(NFTTransfer.is_telegram_gift == True)
+
+                if before_ts is not None and before_id is not None:
                     conditions.append(
-                        or_(
-                            NFTTransfer.from_address == wallet_address,
-                            NFTTransfer.to_address == wallet_address
-                        )
+                        tuple_(NFTTransfer.block_timestamp, NFTTransfer.id)
+                        < tuple_(before_ts, before_id)
+                    )
+                elif before_ts is not None:
+                    conditions.append(NFTTransfer.block_timestamp < before_ts)
+
+                def newest(*direction):
+                    return (
+                        select(*NFTTransfer.__table__.c)
+                        .where(*direction, *conditions)
+                        .order_by(NFTTransfer.block_timestamp.desc(), NFTTransfer.id.desc())
+                        .limit(limit)
+                    )
+
+                if include_sent and include_received:
+                    # One range scan per (address, block_timestamp) index instead
+                    # of a BitmapOr; self-transfers only come from the sent side
+                    both = union_all(
+                        newest(NFTTransfer.from_address == wallet_address),
+                        newest(
+                            NFTTransfer.to_address == wallet_address,
+                            NFTTransfer.from_address != wallet_address,
+                        ),
+                    ).subquery()
+                    query = (
+                        select(*both.c)
+                        .order_by(both.c.block_timestamp.desc(), both.c.id.desc())
+                        .limit(limit)
                     )
                 elif include_sent:
-                    conditions.append(NFTTransfer.from_address == wallet_address)
+                    query = newest(NFTTransfer.from_address == wallet_address)
                 elif include_received:
-                    conditions.append(NFTTransfer.to_address == wallet_address)
-
-                if telegram_gifts_only:
-                    conditions.append(NFTTransfer.is_telegram_gift == True)
-
-                query = (
-                    select(NFTTransfer)
-                    .where(and_(*conditions))
-                    .order_by(NFTTransfer.block_timestamp.desc())
-                    .limit(limit)
-                )
+                    query = newest(NFTTransfer.to_address == wallet_address)
+                else:
+                    return [], None
 
                 result = await session.execute(query)
-                return list(result.scalars().all())
+                rows = [dict(row) for row in result.mappings()]
+
+            next_cursor = None
+            if len(rows) == limit:
+                next_cursor = (rows[-1]["block_timestamp"], rows[-1]["id"])
+            return rows, next_cursor
 
         except Exception as e:
             logger.error(f"Failed to get transfers: {e}")
-            return []
+            return [], None
 
     async def link_wallet_username(
         self,
@@ -224,51 +498,117 @@ class GiftHistoryService:
         """Link a wallet address to a Telegram username/user_id."""
         try:
             async with self.session_factory() as session:
-                # Check existing
-                existing = await session.execute(
-                    select(WalletUsername)
-                    .where(WalletUsername.wallet_address == wallet_address)
+                # Insert new, or fill in known fields on the existing row
+                stmt = pg_insert(WalletUsername).values(
+                    wallet_address=wallet_address,
+                    username=username,
+                    user_id=user_id,
+                    user_name=user_name,
+                    source=source
+                )
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["wallet_address"],
+                    set_={
+                        "username": func.coalesce(stmt.excluded.username, WalletUsername.username),
+                        "user_id": func.coalesce(stmt.excluded.user_id, WalletUsername.user_id),
+                        "user_name": func.coalesce(stmt.excluded.user_name, WalletUsername.user_name),
+                        # Server clock, stored as naive UTC like the column default
+                        "last_verified": func.timezone("UTC", func.now()),
+                    }
                 )
-                record = existing.scalar_one_or_none()
-
-                if record:
-                    # Update existing
-                    if username:
-                        record.username = username
-                    if user_id:
-                        record.user_id = user_id
-                    if user_name:
-                        record.user_name = user_name
-                    record.last_verified = datetime.utcnow()
-                else:
-                    # Create new
-                    record = WalletUsername(
-                        wallet_address=wallet_address,
-                        username=username,
-                        user_id=user_id,
-                        user_name=user_name,
-                        source=source
-                    )
-                    session.add(record)
 
+                await session.execute(stmt)
                 await session.commit()
-                logger.debug(f"Linked wallet {wallet_address[:16]}... to @{username}")
-                return True
+
+            # Mappings for a previous username expire via WALLET_CACHE_TTL
+            self._wallet_cache.pop(wallet_address, None)
+            stale_keys = [WALLET_BY_ADDR_KEY.format(wallet_address)]
+            if username:
+                stale_keys.append(WALLET_BY_USERNAME_KEY.format(username.lstrip("@")))
+            await self._cache_delete(*stale_keys)
+
+            logger.debug(f"Linked wallet {wallet_address[:16]}... to @{username}")
+            return True
 
         except Exception as e:
             logger.error(f"Failed to link wallet: {e}")
             return False
 
+    async def link_wallets_bulk(self, rows: list[dict]) -> int:
+        """
+        Link many wallets to Telegram users in one transaction.
+
+        Rows use link_wallet_username()'s keyword names and must include
+        `wallet_address`; later rows for the same wallet win.
+
+        Returns number of wallets linked.
+        """
+        unique = {row["wallet_address"]: row for row in rows if row.get("wallet_address")}
+        if not unique:
+            return 0
+
+        values = [
+            {
+                "wallet_address": wallet_address,
+                "username": row.get("username"),
+                "user_id": row.get("user_id"),
+                "user_name": row.get("user_name"),
+                "source": row.get("source", "ton_dns"),
+            }
+            for wallet_address, row in unique.items()
+        ]
+
+        try:
+            async with self.session_factory() as session:
+                async with session.begin():
+                    for chunk in _chunks(values):
+                        stmt = pg_insert(WalletUsername).values(chunk)
+                        stmt = stmt.on_conflict_do_update(
+                            index_elements=["wallet_address"],
+                            set_={
+                                "username": func.coalesce(stmt.excluded.username, WalletUsername.username),
+                                "user_id": func.coalesce(stmt.excluded.user_id, WalletUsername.user_id),
+                                "user_name": func.coalesce(stmt.excluded.user_name, WalletUsername.user_name),
+                                "last_verified": func.timezone("UTC", func.now()),
+                            }
+                        )
+                        await session.execute(stmt)
+
+            stale_keys = []
+            for value in values:
+                self._wallet_cache.pop(value["wallet_address"], None)
+                stale_keys.append(WALLET_BY_ADDR_KEY.format(value["wallet_address"]))
+                if value["username"]:
+                    stale_keys.append(WALLET_BY_USERNAME_KEY.format(value["username"].lstrip("@")))
+            await self._cache_delete(*stale_keys)
+
+            logger.debug(f"Linked {len(values)} wallets in bulk")
+            return len(values)
+
+        except Exception as e:
+            logger.error(f"Failed to link wallets in bulk: {e}")
+            return 0
+
     async def get_wallet_by_username(self, username: str) -> Optional[str]:
         """Get wallet address for a username."""
+        username = username.lstrip("@")
+        cache_key = WALLET_BY_USERNAME_KEY.format(username)
+
+        cached = await self._cache_get(cache_key)
+        if cached:
+            return cached
+
         try:
             async with self.session_factory() as session:
                 result = await session.execute(
                     select(WalletUsername.wallet_address)
-                    .where(WalletUsername.username == username.lstrip("@"))
+                    .where(WalletUsername.username == username)
                 )
                 row = result.scalar_one_or_none()
-                return row
+
+            if row:
+                await self._cache_set(cache_key, row)
+            return row
 
         except Exception as e:
             logger.error(f"Failed to get wallet by username: {e}")
@@ -276,6 +616,17 @@ class GiftHistoryService:
 
     async def get_username_by_wallet(self, wallet_address: str) -> Optional[dict]:
         """Get username/user_id for a wallet address."""
+        local = self._local_wallet_get(wallet_address)
+        if local:
+            return local
+
+        cache_key = WALLET_BY_ADDR_KEY.format(wallet_address)
+
+        cached = await self._cache_get(cache_key)
+        if cached:
+            self._local_wallet_set(wallet_address, cached)
+            return cached
+
         try:
             async with self.session_factory() as session:
                 result = await session.execute(
@@ -284,19 +635,81 @@ class GiftHistoryService:
                 )
                 record = result.scalar_one_or_none()
 
-                if record:
-                    return {
-                        "username": record.username,
-                        "user_id": record.user_id,
-                        "user_name": record.user_name,
-                        "source": record.source
-                    }
-                return None
+            if record:
+                info = {
+                    "username": record.username,
+                    "user_id": record.user_id,
+                    "user_name": record.user_name,
+                    "source": record.source
+                }
+                await self._cache_set(cache_key, info)
+                self._local_wallet_set(wallet_address, info)
+                return info
+            return None
 
         except Exception as e:
             logger.error(f"Failed to get username by wallet: {e}")
             return None
 
+    async def get_wallets_by_usernames(self, usernames: list[str]) -> dict[str, str]:
+        """
+        Get wallet addresses for many usernames at once.
+
+        Cached names are read in one pipelined round trip; the rest are fetched with a
+        single query and written back to the cache.
+
+        Returns mapping of username (without @) to wallet address for the
+        usernames that have a known wallet.
+        """
+        names = list(dict.fromkeys(u.lstrip("@") for u in usernames))
+        if not names:
+            return {}
+
+        wallets: dict[str, str] = {}
+        missing = names
+
+        if self.redis:
+            try:
+                cached = await self.redis.mget_json(
+                    [WALLET_BY_USERNAME_KEY.format(n) for n in names]
+                )
+                missing = []
+                for name, value in zip(names, cached):
+                    if value:
+                        wallets[name] = value
+                    else:
+                        missing.append(name)
+            except Exception as e:
+                logger.debug(f"Cache batch read failed: {e}")
+                missing = names
+
+        if not missing:
+            return wallets
+
+        try:
+            async with self.session_factory() as session:
+                result = await session.execute(
+                    select(WalletUsername.username, WalletUsername.wallet_address)
+                    .where(WalletUsername.username == any_(missing))
+                )
+                found = {username: wallet for username, wallet in result.all()}
+
+        except Exception as e:
+            logger.error(f"Failed to get wallets by usernames: {e}")
+            return wallets
+
+        if self.redis and found:
+            try:
+                await self.redis.mset_json(
+                    {WALLET_BY_USERNAME_KEY.format(n): w for n, w in found.items()},
+                    ttl=WALLET_CACHE_TTL,
+                )
+            except Exception as e:
+                logger.debug(f"Cache batch write failed: {e}")
+
+        wallets.update(found)
+        return wallets
+
     async def cache_gift_metadata(
         self,
         slug: str,
@@ -318,67 +731,100 @@ class GiftHistoryService:
         """Cache gift metadata from Fragment."""
         try:
             async with self.session_factory() as session:
-                from datetime import timedelta
-
-                existing = await session.execute(
-                    select(GiftMetadataCache).where(GiftMetadataCache.slug == slug)
-                )
-                record = existing.scalar_one_or_none()
-
                 now = datetime.utcnow()
-                expires = now + timedelta(hours=ttl_hours)
-
-                if record:
-                    record.name = name
-                    record.model = model
-                    record.backdrop = backdrop
-                    record.symbol = symbol
-                    record.sender_id = sender_id
-                    record.sender_username = sender_username
-                    record.recipient_id = recipient_id
-                    record.recipient_username = recipient_username
-                    record.image_url = image_url
-                    record.animation_url = animation_url
-                    record.description = description
-                    record.transfer_date = transfer_date
-                    record.original_message = original_message
-                    record.fetched_at = now
-                    record.expires_at = expires
-                else:
-                    record = GiftMetadataCache(
-                        slug=slug,
-                        name=name,
-                        model=model,
-                        backdrop=backdrop,
-                        symbol=symbol,
-                        sender_id=sender_id,
-                        sender_username=sender_username,
-                        recipient_id=recipient_id,
-                        recipient_username=recipient_username,
-                        image_url=image_url,
-                        animation_url=animation_url,
-                        description=description,
-                        transfer_date=transfer_date,
-                        original_message=original_message,
-                        fetched_at=now,
-                        expires_at=expires
-                    )
-                    session.add(record)
+                values = {
+                    "name": name,
+                    "model": model,
+                    "backdrop": backdrop,
+                    "symbol": symbol,
+                    "sender_id": sender_id,
+                    "sender_username": sender_username,
+                    "recipient_id": recipient_id,
+                    "recipient_username": recipient_username,
+                    "image_url": image_url,
+                    "animation_url": animation_url,
+                    "description": description,
+                    "transfer_date": transfer_date,
+                    "original_message": original_message,
+                    "fetched_at": now,
+                    "expires_at": now + timedelta(hours=ttl_hours),
+                }
+
+                stmt = (
+                    pg_insert(GiftMetadataCache)
+                    .values(slug=slug, **values)
+                    .on_conflict_do_update(index_elements=["slug"], set_=values)
+                )
 
+                await session.execute(stmt)
                 await session.commit()
-                return True
+
+            await self._mark_gifts_fresh([slug], ttl_hours)
+            return True
 
         except Exception as e:
             logger.error(f"Failed to cache gift metadata: {e}")
             return False
 
+    async def cache_gift_metadata_bulk(self, items: list[dict], ttl_hours: int = 24) -> bool:
+        """
+        Cache metadata for many gifts in one transaction.
+
+        Each item uses cache_gift_metadata()'s keyword names and must include
+        `slug` and `name`. Existing slugs are overwritten; if a slug appears
+        more than once in `items`, the last occurrence wins.
+        """
+        if not items:
+            return True
+
+        now = datetime.utcnow()
+        expires = now + timedelta(hours=ttl_hours)
+        fields = (
+            "name", "model", "backdrop", "symbol",
+            "sender_id", "sender_username", "recipient_id", "recipient_username",
+            "image_url", "animation_url", "description",
+            "transfer_date", "original_message",
+        )
+        # ON CONFLICT can't touch the same row twice in one statement
+        unique = {item["slug"]: item for item in items}
+        values = [
+            {
+                "slug": slug,
+                **{f: item.get(f) for f in fields},
+                "fetched_at": now,
+                "expires_at": expires,
+            }
+            for slug, item in unique.items()
+        ]
+
+        try:
+            async with self.session_factory() as session:
+                async with session.begin():
+                    for chunk in _chunks(values):
+                        stmt = pg_insert(GiftMetadataCache).values(chunk)
+                        stmt = stmt.on_conflict_do_update(
+                            index_elements=["slug"],
+                            set_={
+                                col: stmt.excluded[col]
+                                for col in (*fields, "fetched_at", "expires_at")
+                            }
+                        )
+                        await session.execute(stmt)
+
+            await self._mark_gifts_fresh([v["slug"] for v in values], ttl_hours)
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to cache gift metadata in bulk: {e}")
+            return False
+
     async def get_gifts_sent_by_user(
         self,
         user_id: Optional[int] = None,
         username: Optional[str] = None,
         limit: int = 100
-    ) -> list[GiftMetadataCache]:
-        """Get gifts sent by a user (from metadata)."""
+    ) -> list[dict]:
+        """Get gifts sent by a user (from metadata), as column dicts."""
         try:
             async with self.session_factory() as session:
                 conditions = []
@@ -394,14 +840,14 @@ class GiftHistoryService:
                     return []
 
                 query = (
-                    select(GiftMetadataCache)
+                    select(*GiftMetadataCache.__table__.c)
                     .where(or_(*conditions))
                     .order_by(GiftMetadataCache.transfer_date.desc())
                     .limit(limit)
                 )
 
                 result = await session.execute(query)
-                return list(result.scalars().all())
+                return [dict(row) for row in result.mappings()]
 
         except Exception as e:
             logger.error(f"Failed to get gifts sent by user: {e}")
@@ -412,8 +858,8 @@ class GiftHistoryService:
         user_id: Optional[int] = None,
         username: Optional[str] = None,
         limit: int = 100
-    ) -> list[GiftMetadataCache]:
-        """Get gifts received by a user (from metadata)."""
+    ) -> list[dict]:
+        """Get gifts received by a user (from metadata), as column dicts."""
         try:
             async with self.session_factory() as session:
                 conditions = []
@@ -429,19 +875,74 @@ class GiftHistoryService:
                     return []
 
                 query = (
-                    select(GiftMetadataCache)
+                    select(*GiftMetadataCache.__table__.c)
                     .where(or_(*conditions))
                     .order_by(GiftMetadataCache.transfer_date.desc())
                     .limit(limit)
                 )
 
                 result = await session.execute(query)
-                return list(result.scalars().all())
+                return [dict(row) for row in result.mappings()]
 
         except Exception as e:
             logger.error(f"Failed to get gifts received by user: {e}")
             return []
 
+    async def get_user_gift_activity(
+        self,
+        user_id: Optional[int] = None,
+        username: Optional[str] = None,
+        limit: int = 100
+    ) -> dict[str, list[dict]]:
+        """
+        Get gifts sent and received by a user with a single query.
+
+        Returns {"sent": [...], "received": [...]} with the same column dicts
+        as get_gifts_sent_by_user / get_gifts_received_by_user.
+        """
+        activity: dict[str, list[dict]] = {"sent": [], "received": []}
+
+        sent_conditions = []
+        received_conditions = []
+        if user_id:
+            sent_conditions.append(GiftMetadataCache.sender_id == user_id)
+            received_conditions.append(GiftMetadataCache.recipient_id == user_id)
+        if username:
+            username = username.lstrip("@")
+            sent_conditions.append(GiftMetadataCache.sender_username == username)
+            received_conditions.append(GiftMetadataCache.recipient_username == username)
+
+        if not sent_conditions:
+            return activity
+
+        def tagged(role: str, conditions: list):
+            return (
+                select(*GiftMetadataCache.__table__.c, literal(role).label("role"))
+                .where(or_(*conditions))
+                .order_by(GiftMetadataCache.transfer_date.desc())
+                .limit(limit)
+            )
+
+        try:
+            async with self.session_factory() as session:
+                both = union_all(
+                    tagged("sent", sent_conditions),
+                    tagged("received", received_conditions),
+                ).subquery()
+                # UNION ALL doesn't keep branch order; sort so each role stays newest first
+                query = select(*both.c).order_by(both.c.role, both.c.transfer_date.desc())
+
+                result = await session.execute(query)
+                for row in result.mappings():
+                    gift = dict(row)
+                    activity[gift.pop("role")].append(gift)
+
+            return activity
+
+        except Exception as e:
+            logger.error(f"Failed to get user gift activity: {e}")
+            return activity
+
 
 # SQL to create tables (run once)
 CREATE_TABLES_SQL = """
@@ -463,13 +964,19 @@ CREATE TABLE IF NOT EXISTS nft_transfers (
 
 CREATE INDEX IF NOT EXISTS ix_nft_transfers_tx_hash ON nft_transfers(tx_hash);
 CREATE INDEX IF NOT EXISTS ix_nft_transfers_nft_address ON nft_transfers(nft_address);
-CREATE INDEX IF NOT EXISTS ix_nft_transfers_collection_address ON nft_transfers(collection_address);
-CREATE INDEX IF NOT EXISTS ix_nft_transfers_from_address ON nft_transfers(from_address);
-CREATE INDEX IF NOT EXISTS ix_nft_transfers_to_address ON nft_transfers(to_address);
 CREATE INDEX IF NOT EXISTS ix_nft_transfers_block_timestamp ON nft_transfers(block_timestamp);
-CREATE INDEX IF NOT EXISTS ix_nft_transfers_is_telegram_gift ON nft_transfers(is_telegram_gift);
+CREATE INDEX IF NOT EXISTS ix_nft_transfers_tg_gift_partial ON nft_transfers(block_timestamp DESC) WHERE is_telegram_gift = TRUE;
 CREATE INDEX IF NOT EXISTS ix_nft_transfers_from_to ON nft_transfers(from_address, to_address);
 CREATE INDEX IF NOT EXISTS ix_nft_transfers_collection_time ON nft_transfers(collection_address, block_timestamp);
+CREATE INDEX IF NOT EXISTS ix_nft_transfers_from_time ON nft_transfers(from_address, block_timestamp DESC);
+CREATE INDEX IF NOT EXISTS ix_nft_transfers_to_time ON nft_transfers(to_address, block_timestamp DESC);
+
+-- Covered by the composite indexes above (same leftmost column)
+DROP INDEX IF EXISTS ix_nft_transfers_from_address;
+DROP INDEX IF EXISTS ix_nft_transfers_collection_address;
+DROP INDEX IF EXISTS ix_nft_transfers_to_address;
+-- Replaced by the partial ix_nft_transfers_tg_gift_partial
+DROP INDEX IF EXISTS ix_nft_transfers_is_telegram_gift;
 
 CREATE TABLE IF NOT EXISTS wallet_usernames (
     id SERIAL PRIMARY KEY,
@@ -483,10 +990,12 @@ CREATE TABLE IF NOT EXISTS wallet_usernames (
 );
 
 CREATE INDEX IF NOT EXISTS ix_wallet_usernames_wallet_address ON wallet_usernames(wallet_address);
-CREATE INDEX IF NOT EXISTS ix_wallet_usernames_username ON wallet_usernames(username);
 CREATE INDEX IF NOT EXISTS ix_wallet_usernames_user_id ON wallet_usernames(user_id);
 CREATE INDEX IF NOT EXISTS ix_wallet_usernames_user ON wallet_usernames(username, user_id);
 
+-- Covered by ix_wallet_usernames_user
+DROP INDEX IF EXISTS ix_wallet_usernames_username;
+
 CREATE TABLE IF NOT EXISTS gift_metadata_cache (
     id SERIAL PRIMARY KEY,
     slug VARCHAR(100) UNIQUE NOT NULL,
@@ -1,18 +1,34 @@
 """PostgreSQL database connection and base operations."""
 
+import asyncio
 import logging
 from typing import AsyncGenerator
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import Pool, QueuePool
 from src.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Client-side prepared statement caches (asyncpg and SQLAlchemy's adapter)
+STATEMENT_CACHE_SIZE = 1024
+
+# Per-connection server settings. The scanner runs many small OLTP queries
+# where JIT compilation costs more than it saves.
+SERVER_SETTINGS = {"jit": "off"}
+
+
+def asyncpg_url(url: str) -> str:
+    """Force the asyncpg driver on a PostgreSQL URL."""
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(
+        hide_password=False
+    )
+
 
 class Database:
     """Database connection manager."""
@@ -21,15 +37,36 @@ class Database:
         self.engine: AsyncEngine | None = None
         self.session_factory: async_sessionmaker[AsyncSession] | None = None
 
-    async def connect(self):
-        """Initialize database connection."""
+    async def connect(self, poolclass: type[Pool] | None = None):
+        """
+        Initialize database connection.
+
+        Args:
+            poolclass: Override the pool implementation, e.g. NullPool for
+                one-off scripts that shouldn't keep connections open.
+        """
         logger.info(f"Connecting to database: {settings.DATABASE_URL.split('@')[1]}")
 
+        if poolclass is not None:
+            pool_kwargs = {"poolclass": poolclass}
+        else:
+            pool_kwargs = {
+                "pool_size": settings.DB_POOL_SIZE,
+                "max_overflow": settings.DB_MAX_OVERFLOW,
+                "pool_recycle": settings.DB_POOL_RECYCLE,
+            }
+
         self.engine = create_async_engine(
-            settings.DATABASE_URL,
+            asyncpg_url(settings.DATABASE_URL),
             echo=settings.ENVIRONMENT == "development",
-            poolclass=NullPool,  # Disable connection pooling for simplicity
             pool_pre_ping=True,
+            connect_args={
+                "statement_cache_size": STATEMENT_CACHE_SIZE,
+                "max_cached_statement_lifetime": 0,
+                "server_settings": SERVER_SETTINGS,
+                "prepared_statement_cache_size": STATEMENT_CACHE_SIZE,
+            },
+            **pool_kwargs,
         )
 
         self.session_factory = async_sessionmaker(
@@ -38,8 +75,36 @@ class Database:
             expire_on_commit=False,
         )
 
+        if poolclass is None and settings.DB_POOL_PREWARM > 0:
+            await self._prewarm(settings.DB_POOL_PREWARM)
+
         logger.info("Database connected successfully")
 
+    async def _prewarm(self, count: int):
+        """Open `count` pooled connections up front so first requests skip the handshake."""
+        conns = await asyncio.gather(
+            *(self.engine.connect() for _ in range(count)),
+            return_exceptions=True,
+        )
+        for conn in conns:
+            if isinstance(conn, Exception):
+                logger.warning(f"Failed to pre-warm database connection: {conn}")
+            else:
+                await conn.close()
+
+    def get_pool_stats(self) -> dict:
+        """Connection pool usage, for logging/metrics (empty without a queue pool)."""
+        if not self.engine or not isinstance(self.engine.pool, QueuePool):
+            return {}
+
+        pool = self.engine.pool
+        return {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        }
+
     async def disconnect(self):
         """Close database connection."""
         if self.engine:
@@ -4,11 +4,31 @@ import json
 import logging
 from typing import Any, Optional
 from redis.asyncio import Redis, ConnectionPool
+from redis.utils import HIREDIS_AVAILABLE
 from src.config import settings
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
+def _dumps(value: Any) -> str:
+    """Serialize a value to a JSON string (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(value, default=str)
+
+
+def _loads(value: str | bytes) -> Any:
+    """Parse a JSON string (orjson when available)."""
+    if orjson is not None:
+        return orjson.loads(value)
+    return json.loads(value)
+
+
 class RedisClient:
     """Redis cache client."""
 
@@ -32,6 +52,10 @@ class RedisClient:
         await self.redis.ping()
         logger.info("Redis connected successfully")
 
+        # redis-py picks the C parser automatically when hiredis is installed
+        if not HIREDIS_AVAILABLE:
+            logger.warning("hiredis not installed, Redis replies use the pure-Python parser")
+
     async def disconnect(self):
         """Disconnect from Redis."""
         if self.redis:
@@ -50,7 +74,7 @@ class RedisClient:
         """Get JSON value by key."""
         value = await self.get(key)
         if value:
-            return json.loads(value)
+            return _loads(value)
         return None
 
     async def set(self, key: str, value: str, ttl: Optional[int] = None) -> bool:
@@ -63,7 +87,57 @@ class RedisClient:
 
     async def set_json(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
         """Set JSON value with optional TTL."""
-        return await self.set(key, json.dumps(value, default=str), ttl)
+        return await self.set(key, _dumps(value), ttl)
+
+    async def mget_json(self, keys: list[str]) -> list[Optional[Any]]:
+        """Get JSON values for multiple keys in one round trip (None for missing keys)."""
+        if not self.redis:
+            raise RuntimeError("Redis not connected")
+        if not keys:
+            return []
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.get(key)
+            values = await pipe.execute()
+        return [_loads(v) if v else None for v in values]
+
+    async def mset_json(self, mapping: dict[str, Any], ttl: Optional[int] = None) -> None:
+        """Set multiple JSON values with optional TTL in one round trip."""
+        if not self.redis:
+            raise RuntimeError("Redis not connected")
+        if not mapping:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, value in mapping.items():
+                data = _dumps(value)
+                if ttl:
+                    pipe.setex(key, ttl, data)
+                else:
+                    pipe.set(key, data)
+            await pipe.execute()
+
+    async def set_json_indexed(self, key: str, value: Any, index_key: str, ttl: int) -> None:
+        """
+        Set a JSON value with TTL and record its key in an index set.
+
+        All keys in the index can later be dropped at once with
+        delete_indexed(), without a KEYS/SCAN over the keyspace.
+        """
+        if not self.redis:
+            raise RuntimeError("Redis not connected")
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.setex(key, ttl, _dumps(value))
+            pipe.sadd(index_key, key)
+            # The index lives as long as its newest member
+            pipe.expire(index_key, ttl)
+            await pipe.execute()
+
+    async def delete_indexed(self, index_key: str) -> int:
+        """Delete every key recorded in an index set, and the set itself."""
+        if not self.redis:
+            raise RuntimeError("Redis not connected")
+        keys = await self.redis.smembers(index_key)
+        return await self.redis.delete(index_key, *keys)
 
     async def delete(self, key: str) -> int:
         """Delete key."""
@@ -96,10 +170,16 @@ class RedisClient:
         return await self.redis.ttl(key)
 
     async def keys(self, pattern: str) -> list[str]:
-        """Get keys matching pattern."""
+        """
+        Get keys matching pattern.
+
+        Uses cursor-based SCAN so large keyspaces don't block Redis. Order is
+        not guaranteed, and a key may appear more than once if the keyspace
+        changes while scanning.
+        """
         if not self.redis:
             raise RuntimeError("Redis not connected")
-        return await self.redis.keys(pattern)
+        return [key async for key in self.redis.scan_iter(match=pattern, count=500)]
 
 
 # Global Redis client
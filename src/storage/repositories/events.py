@@ -2,15 +2,55 @@
 
 import logging
 from datetime import datetime, timedelta
-from decimal import Decimal
 from typing import List, Optional
-from sqlalchemy import select, func, and_
+from sqlalchemy import bindparam, column, func, select, table, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.dialects.postgresql import insert
 from src.core.models import MarketEvent, EventType
 
 logger = logging.getLogger(__name__)
 
+# Lightweight table construct for building parameterized selects.
+# price/price_old are NUMERIC, so the driver already returns them as Decimal.
+market_events = table(
+    "market_events",
+    column("id"),
+    column("event_time"),
+    column("event_type"),
+    column("gift_id"),
+    column("model"),
+    column("backdrop"),
+    column("price"),
+    column("price_old"),
+)
+
+SAVE_EVENT_SQL = text("""
+    INSERT INTO market_events
+    (event_time, event_type, gift_id, gift_name, model, backdrop, pattern, number,
+     price, price_old, source, raw_data)
+    VALUES (:event_time, :event_type, :gift_id, :gift_name, :model, :backdrop, :pattern,
+            :number, :price, :price_old, :source, :raw_data)
+    RETURNING id
+""").bindparams(bindparam("raw_data", type_=JSONB(none_as_null=True)))
+
+
+def _asset_conditions(asset_key: str) -> list:
+    """Build model/backdrop filters from an asset key ("model:backdrop")."""
+    parts = asset_key.split(":")
+    model = parts[0] if parts else None
+    backdrop = parts[1] if len(parts) > 1 and parts[1] != "no_bg" else None
+
+    conditions = []
+    if model:
+        conditions.append(market_events.c.model == model)
+
+    if backdrop:
+        conditions.append(market_events.c.backdrop == backdrop)
+    elif len(parts) > 1 and parts[1] == "no_bg":
+        conditions.append(market_events.c.backdrop.is_(None))
+
+    return conditions
+
 
 class EventsRepository:
     """Repository for market_events table."""
@@ -20,30 +60,22 @@ class EventsRepository:
 
     async def save_event(self, event: MarketEvent) -> int:
         """Save market event to database."""
-        query = """
-        INSERT INTO market_events
-        (event_time, event_type, gift_id, gift_name, model, backdrop, pattern, number,
-         price, price_old, source, raw_data)
-        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
-        RETURNING id
-        """
-
         result = await self.session.execute(
-            query,
-            (
-                event.event_time,
-                event.event_type.value,
-                event.gift_id,
-                event.gift_name,
-                event.model,
-                event.backdrop,
-                event.pattern,
-                event.number,
-                float(event.price),
-                float(event.price_old) if event.price_old else None,
-                event.source.value,
-                event.raw_data,
-            ),
+            SAVE_EVENT_SQL,
+            {
+                "event_time": event.event_time,
+                "event_type": event.event_type.value,
+                "gift_id": event.gift_id,
+                "gift_name": event.gift_name,
+                "model": event.model,
+                "backdrop": event.backdrop,
+                "pattern": event.pattern,
+                "number": event.number,
+                "price": event.price,
+                "price_old": event.price_old,
+                "source": event.source.value,
+                "raw_data": event.raw_data,
+            },
         )
 
         await self.session.commit()
@@ -60,99 +92,84 @@ class EventsRepository:
         """Get recent events for an asset."""
         since = datetime.utcnow() - timedelta(hours=hours)
 
-        query = """
-        SELECT event_time, event_type, price, price_old
-        FROM market_events
-        WHERE event_time >= $1
-        """
-
-        params = [since]
-
-        # Parse asset_key to extract model and backdrop
-        parts = asset_key.split(":")
-        model = parts[0] if parts else None
-        backdrop = parts[1] if len(parts) > 1 and parts[1] != "no_bg" else None
-
-        if model:
-            query += " AND model = $2"
-            params.append(model)
-
-        if backdrop:
-            query += " AND backdrop = $3"
-            params.append(backdrop)
-        elif len(parts) > 1 and parts[1] == "no_bg":
-            query += " AND backdrop IS NULL"
+        query = (
+            select(
+                market_events.c.event_time,
+                market_events.c.event_type,
+                market_events.c.price,
+                market_events.c.price_old,
+            )
+            .where(market_events.c.event_time >= since, *_asset_conditions(asset_key))
+        )
 
         if event_types:
-            placeholders = ", ".join([f"${i+len(params)+1}" for i in range(len(event_types))])
-            query += f" AND event_type IN ({placeholders})"
-            params.extend([et.value for et in event_types])
+            query = query.where(market_events.c.event_type.in_([et.value for et in event_types]))
 
-        query += " ORDER BY event_time DESC LIMIT 100"
+        query = query.order_by(market_events.c.event_time.desc()).limit(100)
 
-        result = await self.session.execute(query, params)
+        result = await self.session.execute(query)
         rows = result.fetchall()
 
         return [
             {
                 "event_time": row[0],
                 "event_type": row[1],
-                "price": Decimal(str(row[2])),
-                "price_old": Decimal(str(row[3])) if row[3] else None,
+                "price": row[2],
+                "price_old": row[3],
             }
             for row in rows
         ]
 
+    @staticmethod
+    def _sales_conditions(asset_key: str, days: int) -> list:
+        """Filters selecting buy events for an asset in the last `days` days."""
+        since = datetime.utcnow() - timedelta(days=days)
+        return [
+            market_events.c.event_type == EventType.BUY.value,
+            market_events.c.event_time >= since,
+            *_asset_conditions(asset_key),
+        ]
+
     async def get_sales(
         self, asset_key: str, days: int = 7
     ) -> List[dict]:
         """Get buy events (sales) for an asset."""
-        since = datetime.utcnow() - timedelta(days=days)
-
-        # Parse asset_key
-        parts = asset_key.split(":")
-        model = parts[0] if parts else None
-        backdrop = parts[1] if len(parts) > 1 and parts[1] != "no_bg" else None
-
-        query = """
-        SELECT event_time, price
-        FROM market_events
-        WHERE event_type = 'buy' AND event_time >= $1
-        """
-
-        params = [since]
-
-        if model:
-            query += " AND model = $2"
-            params.append(model)
-
-        if backdrop:
-            query += " AND backdrop = $3"
-            params.append(backdrop)
-        elif len(parts) > 1 and parts[1] == "no_bg":
-            query += " AND backdrop IS NULL"
-
-        query += " ORDER BY event_time DESC"
+        query = (
+            select(market_events.c.event_time, market_events.c.price)
+            .where(*self._sales_conditions(asset_key, days))
+            .order_by(market_events.c.event_time.desc())
+        )
 
-        result = await self.session.execute(query, params)
+        result = await self.session.execute(query)
         rows = result.fetchall()
 
         return [
             {
                 "event_time": row[0],
-                "price": Decimal(str(row[1])),
+                "price": row[1],
             }
             for row in rows
         ]
 
     async def count_sales(self, asset_key: str, days: int = 7) -> int:
         """Count sales for an asset."""
-        sales = await self.get_sales(asset_key, days)
-        return len(sales)
+        query = (
+            select(func.count())
+            .select_from(market_events)
+            .where(*self._sales_conditions(asset_key, days))
+        )
+
+        result = await self.session.execute(query)
+        return result.scalar() or 0
 
     async def get_last_sale_time(self, asset_key: str) -> Optional[datetime]:
         """Get timestamp of last sale."""
-        sales = await self.get_sales(asset_key, days=30)
-        if sales:
-            return sales[0]["event_time"]
-        return None
+        query = (
+            select(market_events.c.event_time)
+            .where(*self._sales_conditions(asset_key, days=30))
+            .order_by(market_events.c.event_time.desc())
+            .limit(1)
+        )
+
+        result = await self.session.execute(query)
+        return result.scalar()
@@ -1,157 +1,368 @@
 """Repository for active listings."""
 
+import json
 import logging
-from typing import List, Optional
+import asyncpg
+from typing import AsyncIterator, List, Optional
 from decimal import Decimal
-from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.core.models import ActiveListing, BLACK_PACK_BACKGROUNDS
+from src.storage.redis_client import RedisClient
 
 logger = logging.getLogger(__name__)
 
+# Columns written by the bulk upserts, in record order
+LISTING_WRITE_COLUMNS = (
+    "gift_id", "gift_name", "model", "backdrop", "pattern", "number",
+    "price", "listed_at", "export_at", "source", "raw_data",
+)
+
+# Columns refreshed when a listing already exists (source/raw_data keep first values)
+UPSERT_UPDATE_COLUMNS = (
+    "price", "gift_name", "model", "backdrop", "pattern", "number", "listed_at", "export_at",
+)
+
+_WRITE_COLUMNS_SQL = ", ".join(LISTING_WRITE_COLUMNS)
+_UPSERT_SET_SQL = ", ".join(f"{name} = EXCLUDED.{name}" for name in UPSERT_UPDATE_COLUMNS)
+
+# raw_data is sent as JSON text and cast on the server, so writes don't
+# depend on the jsonb codec of the connection (SQLAlchemy's adapter and
+# the API pool register different ones)
+_WRITE_VALUES_SQL = _WRITE_COLUMNS_SQL.replace("raw_data", "raw_data::jsonb")
+_STAGE_COLUMNS_SQL = _WRITE_COLUMNS_SQL.replace("raw_data", "raw_data::text AS raw_data")
+
+# One parameter per column, each an array of values: the statement text is
+# the same for every batch size, so it is prepared once per connection
+UPSERT_UNNEST_SQL = f"""
+INSERT INTO active_listings ({_WRITE_COLUMNS_SQL}, last_updated)
+SELECT {_WRITE_VALUES_SQL}, NOW() FROM UNNEST(
+    $1::varchar[], $2::varchar[], $3::varchar[], $4::varchar[], $5::varchar[],
+    $6::integer[], $7::numeric[], $8::timestamptz[], $9::timestamptz[],
+    $10::varchar[], $11::text[]
+) AS t({_WRITE_COLUMNS_SQL})
+ON CONFLICT (gift_id) DO UPDATE SET {_UPSERT_SET_SQL}, last_updated = NOW()
+"""
+
+# Batches at least this large are loaded with COPY through a staging table
+COPY_THRESHOLD = 100
+
+# get_floors results are cached briefly in Redis, indexed per model so
+# writes can drop every cached variant for the models they touched
+FLOORS_KEY = "floors:{}:{}:{}"
+FLOORS_INDEX_KEY = "floors_index:{}"
+FLOORS_CACHE_TTL = 3  # seconds
+
+# Column order expected by ActiveListing.from_row
+LISTING_COLUMNS = """
+gift_id, gift_name, model, backdrop, pattern, number, price,
+listed_at, export_at, source, raw_data, last_updated
+"""
+LISTING_SELECT = f"SELECT {LISTING_COLUMNS} FROM active_listings"
+
+# Cheapest listings plus the asset's total count in one pass
+SNAPSHOT_SELECT = f"SELECT {LISTING_COLUMNS}, COUNT(*) OVER () AS total FROM active_listings"
+SNAPSHOT_LIMIT = 10
+
+# Rows fetched per round trip when streaming listings
+LISTING_CURSOR_PREFETCH = 500
+
+
+def _listing_record(listing: ActiveListing) -> tuple:
+    """Column values for a listing, in LISTING_WRITE_COLUMNS order."""
+    return (
+        listing.gift_id,
+        listing.gift_name,
+        listing.model,
+        listing.backdrop,
+        listing.pattern,
+        listing.number,
+        listing.price,
+        listing.listed_at,
+        listing.export_at,
+        listing.source.value,
+        json.dumps(listing.raw_data, default=str) if listing.raw_data is not None else None,
+    )
+
+
+def _asset_where(model: str, backdrop: Optional[str]) -> tuple[str, list]:
+    """
+    Build the WHERE clause and positional params for an asset.
+
+    backdrop=None matches any backdrop; backdrop="" matches listings
+    without one (backdrop IS NULL).
+    """
+    where = " WHERE model = $1"
+    params = [model]
+
+    if backdrop:
+        where += " AND backdrop = $2"
+        params.append(backdrop)
+    elif backdrop == "":
+        where += " AND backdrop IS NULL"
+
+    return where, params
+
+
+def _floors_from_prices(prices: List[Decimal]) -> dict:
+    """Shape the cheapest prices (ascending) into get_floors()'s result."""
+    return {
+        "first": prices[0] if len(prices) > 0 else None,
+        "second": prices[1] if len(prices) > 1 else None,
+        "third": prices[2] if len(prices) > 2 else None,
+        "count": len(prices),
+    }
+
 
 class ListingsRepository:
-    """Repository for active_listings table."""
+    """
+    Repository for active_listings table.
+
+    Works on an AsyncSession, or directly on an asyncpg pool (e.g. the API's
+    DatabasePool.pool). With a pool, every method skips SQLAlchemy and runs
+    on a pooled connection; the pool wins when both are given.
+    """
+
+    def __init__(
+        self,
+        session: Optional[AsyncSession] = None,
+        redis: Optional[RedisClient] = None,
+        pool: Optional[asyncpg.Pool] = None,
+    ):
+        if session is None and pool is None:
+            raise ValueError("ListingsRepository needs a session or an asyncpg pool")
 
-    def __init__(self, session: AsyncSession):
         self.session = session
+        self.redis = redis
+        self.pool = pool
+
+    async def _cache_get(self, key: str):
+        """Read a cached value (best effort, None on miss or error)."""
+        if not self.redis:
+            return None
+        try:
+            return await self.redis.get_json(key)
+        except Exception as e:
+            logger.debug(f"Cache read failed for {key}: {e}")
+            return None
+
+    async def _cache_set(self, model: str, key: str, value):
+        """Cache a floors result under the model's index (best effort)."""
+        if not self.redis:
+            return
+        try:
+            await self.redis.set_json_indexed(
+                key, value, FLOORS_INDEX_KEY.format(model), FLOORS_CACHE_TTL
+            )
+        except Exception as e:
+            logger.debug(f"Cache write failed for {key}: {e}")
+
+    async def _invalidate_floors(self, models: set):
+        """Drop cached floors for the given models (best effort)."""
+        if not self.redis:
+            return
+        for model in models:
+            if model is None:
+                continue
+            try:
+                await self.redis.delete_indexed(FLOORS_INDEX_KEY.format(model))
+            except Exception as e:
+                logger.debug(f"Cache invalidation failed for {model}: {e}")
+
+    async def _driver_connection(self) -> asyncpg.Connection:
+        """The asyncpg connection behind the session."""
+        if self.session is None:
+            raise RuntimeError("ListingsRepository has no session; use the pool instead")
+
+        sa_conn = await self.session.connection()
+        raw_conn = await sa_conn.get_raw_connection()
+        return raw_conn.driver_connection
+
+    async def _fetch(self, sql: str, *params) -> List[asyncpg.Record]:
+        """
+        Fetch rows on the pool, or on the session's driver connection.
+
+        asyncpg's per-connection statement cache (statement_cache_size) keeps
+        each query parsed and planned once per connection.
+        """
+        if self.pool is not None:
+            return await self.pool.fetch(sql, *params)
+        conn = await self._driver_connection()
+        return await conn.fetch(sql, *params)
+
+    async def _fetchval(self, sql: str, *params):
+        """Fetch one value on the pool, or on the session's driver connection."""
+        if self.pool is not None:
+            return await self.pool.fetchval(sql, *params)
+        conn = await self._driver_connection()
+        return await conn.fetchval(sql, *params)
 
     async def upsert_listings(self, listings: List[ActiveListing]):
         """Insert or update multiple listings."""
         if not listings:
             return
 
-        query = """
-        INSERT INTO active_listings
-        (gift_id, gift_name, model, backdrop, pattern, number, price, listed_at, export_at, source, raw_data, last_updated)
-        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, NOW())
-        ON CONFLICT (gift_id)
-        DO UPDATE SET
-            price = EXCLUDED.price,
-            gift_name = EXCLUDED.gift_name,
-            model = EXCLUDED.model,
-            backdrop = EXCLUDED.backdrop,
-            pattern = EXCLUDED.pattern,
-            number = EXCLUDED.number,
-            listed_at = EXCLUDED.listed_at,
-            export_at = EXCLUDED.export_at,
-            last_updated = NOW()
-        """
+        # ON CONFLICT can't touch the same row twice in one statement,
+        # so keep only the latest listing per gift_id
+        unique = list({listing.gift_id: listing for listing in listings}.values())
 
-        for listing in listings:
-            try:
-                await self.session.execute(
-                    text(query),
-                    {
-                        "1": listing.gift_id,
-                        "2": listing.gift_name,
-                        "3": listing.model,
-                        "4": listing.backdrop,
-                        "5": listing.pattern,
-                        "6": listing.number,
-                        "7": float(listing.price),
-                        "8": listing.listed_at,
-                        "9": listing.export_at,
-                        "10": listing.source.value,
-                        "11": listing.raw_data,
-                    },
-                )
-            except Exception as e:
-                logger.error(f"Error upserting listing {listing.gift_id}: {e}")
+        # One transaction for the whole batch: all rows land or none do
+        try:
+            if self.pool is not None:
+                async with self.pool.acquire() as conn:
+                    async with conn.transaction():
+                        await self._write_listings(conn, unique)
+            else:
+                # session.begin() needs a fresh transaction; finish the one
+                # earlier queries on this session may have left open
+                if self.session.in_transaction():
+                    await self.session.commit()
+
+                # SQLAlchemy only starts the driver transaction lazily on its own
+                # statements, so open it explicitly for the raw driver calls
+                async with self.session.begin():
+                    conn = await self._driver_connection()
+                    async with conn.transaction():
+                        await self._write_listings(conn, unique)
+        except asyncpg.IntegrityConstraintViolationError as e:
+            logger.error(f"Listings batch rejected: {e}", extra={"batch_size": len(unique)})
+            raise
+
+        await self._invalidate_floors({listing.model for listing in unique})
+        logger.debug(f"Upserted {len(unique)} listings")
+
+    async def _write_listings(self, conn: asyncpg.Connection, listings: List[ActiveListing]):
+        """Upsert listings on a driver connection (COPY for large batches, else UNNEST)."""
+        records = [_listing_record(listing) for listing in listings]
+
+        if len(records) < COPY_THRESHOLD:
+            # asyncpg's per-connection statement cache keeps this prepared
+            await conn.execute(UPSERT_UNNEST_SQL, *map(list, zip(*records)))
+            return
 
-        await self.session.commit()
-        logger.debug(f"Upserted {len(listings)} listings")
+        # Large batch: COPY into a staging table, dropped when the enclosing
+        # transaction commits
+        await conn.execute(
+            f"CREATE TEMP TABLE active_listings_stage ON COMMIT DROP AS "
+            f"SELECT {_STAGE_COLUMNS_SQL} FROM active_listings WITH NO DATA"
+        )
+        await conn.copy_records_to_table(
+            "active_listings_stage",
+            records=records,
+            columns=LISTING_WRITE_COLUMNS,
+        )
+        await conn.execute(
+            f"INSERT INTO active_listings ({_WRITE_COLUMNS_SQL}, last_updated) "
+            f"SELECT {_WRITE_VALUES_SQL}, NOW() FROM active_listings_stage "
+            f"ON CONFLICT (gift_id) DO UPDATE SET {_UPSERT_SET_SQL}, last_updated = NOW()"
+        )
 
     async def remove_listing(self, gift_id: str):
         """Remove a listing (when it's bought)."""
-        query = "DELETE FROM active_listings WHERE gift_id = $1"
-        await self.session.execute(text(query), {"1": gift_id})
-        await self.session.commit()
+        model = await self._fetchval(
+            "DELETE FROM active_listings WHERE gift_id = $1 RETURNING model", gift_id
+        )
+        # Pool statements autocommit; the session's transaction needs a commit
+        if self.pool is None:
+            await self.session.commit()
+        await self._invalidate_floors({model})
         logger.debug(f"Removed listing {gift_id}")
 
     async def get_floors(
         self, model: str, backdrop: Optional[str] = None, background_filter: str = "any"
     ) -> dict:
-        """Get floor prices for an asset."""
+        """Get floor prices for an asset (cached for FLOORS_CACHE_TTL seconds)."""
+        cache_key = FLOORS_KEY.format(model, backdrop or "", background_filter)
+        cached = await self._cache_get(cache_key)
+        if cached is not None:
+            return _floors_from_prices([Decimal(p) for p in cached])
+
         query = """
         SELECT price
         FROM active_listings
         WHERE model = $1
         """
-        params = {"1": model}
-        param_count = 1
+        params = [model]
 
         if background_filter == "none":
             query += " AND backdrop IS NULL"
         elif background_filter == "black_pack":
-            param_count += 1
-            query += f" AND backdrop IN ($2, $3)"
-            params["2"] = "Black"
-            params["3"] = "Black Onyx"
+            query += " AND backdrop IN ($2, $3)"
+            params += ["Black", "Black Onyx"]
         elif backdrop:
-            param_count += 1
-            query += f" AND backdrop = ${param_count}"
-            params[str(param_count)] = backdrop
+            query += " AND backdrop = $2"
+            params.append(backdrop)
 
         query += " ORDER BY price ASC LIMIT 10"
 
-        result = await self.session.execute(text(query), params)
-        rows = result.fetchall()
+        rows = await self._fetch(query, *params)
 
-        prices = [Decimal(str(row[0])) for row in rows]
+        # NUMERIC arrives as Decimal from asyncpg's binary codec
+        prices = [row[0] for row in rows]
 
-        return {
-            "first": prices[0] if len(prices) > 0 else None,
-            "second": prices[1] if len(prices) > 1 else None,
-            "third": prices[2] if len(prices) > 2 else None,
-            "count": len(prices),
-        }
+        await self._cache_set(model, cache_key, [str(p) for p in prices])
+        return _floors_from_prices(prices)
 
     async def get_listings_for_asset(
         self, model: str, backdrop: Optional[str] = None
     ) -> List[ActiveListing]:
         """Get all listings for an asset."""
-        query = """
-        SELECT gift_id, gift_name, model, backdrop, pattern, number, price,
-               listed_at, export_at, source, raw_data, last_updated
-        FROM active_listings
-        WHERE model = $1
+        where, params = _asset_where(model, backdrop)
+        rows = await self._fetch(LISTING_SELECT + where + " ORDER BY price ASC", *params)
+
+        return [ActiveListing.from_row(row) for row in rows]
+
+    async def iter_listings_for_asset(
+        self, model: str, backdrop: Optional[str] = None
+    ) -> AsyncIterator[ActiveListing]:
         """
-        params = {"1": model}
+        Stream listings for an asset, cheapest first, without loading them all.
 
-        if backdrop:
-            query += " AND backdrop = $2"
-            params["2"] = backdrop
-        elif backdrop == "":
-            query += " AND backdrop IS NULL"
+        Rows are read through a server-side cursor, LISTING_CURSOR_PREFETCH
+        at a time; cursors need a transaction, which is held while iterating.
+        """
+        where, params = _asset_where(model, backdrop)
+        sql = LISTING_SELECT + where + " ORDER BY price ASC"
 
-        query += " ORDER BY price ASC"
-
-        result = await self.session.execute(text(query), params)
-        rows = result.fetchall()
-
-        listings = []
-        for row in rows:
-            listings.append(
-                ActiveListing(
-                    gift_id=row[0],
-                    gift_name=row[1],
-                    model=row[2],
-                    backdrop=row[3],
-                    pattern=row[4],
-                    number=row[5],
-                    price=Decimal(str(row[6])),
-                    listed_at=row[7],
-                    export_at=row[8],
-                    source=row[9],
-                    raw_data=row[10],
-                    last_updated=row[11],
-                )
-            )
+        if self.pool is not None:
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    async for row in conn.cursor(sql, *params, prefetch=LISTING_CURSOR_PREFETCH):
+                        yield ActiveListing.from_row(row)
+            return
+
+        conn = await self._driver_connection()
+
+        async with conn.transaction():
+            async for row in conn.cursor(sql, *params, prefetch=LISTING_CURSOR_PREFETCH):
+                yield ActiveListing.from_row(row)
+
+    async def get_market_snapshot(self, model: str, backdrop: Optional[str] = None) -> dict:
+        """
+        Get floors, listing count and the cheapest listings in one query.
+
+        Uses the same model/backdrop filter as get_listings_for_asset.
 
-        return listings
+        Returns:
+            {"floors": get_floors()-shaped dict, "count": total listings,
+             "top": up to SNAPSHOT_LIMIT cheapest ActiveListing objects}
+        """
+        where, params = _asset_where(model, backdrop)
+        rows = await self._fetch(
+            SNAPSHOT_SELECT + where + f" ORDER BY price ASC LIMIT {SNAPSHOT_LIMIT}", *params
+        )
+
+        return {
+            "floors": _floors_from_prices([row["price"] for row in rows]),
+            "count": rows[0]["total"] if rows else 0,
+            "top": [ActiveListing.from_row(row) for row in rows],
+        }
 
     async def count_listings(self, model: str, backdrop: Optional[str] = None) -> int:
-        """Count listings for an asset."""
-        listings = await self.get_listings_for_asset(model, backdrop)
-        return len(listings)
+        """
+        Count listings for an asset without loading them.
+
+        Uses the same filter as get_listings_for_asset: backdrop=None counts
+        every backdrop, backdrop="" counts listings without one.
+        """
+        where, params = _asset_where(model, backdrop)
+        return await self._fetchval("SELECT COUNT(*) FROM active_listings" + where, *params) or 0
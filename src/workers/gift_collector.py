@@ -12,6 +12,9 @@ Over time, this builds a comprehensive database of:
 """
 
 import os
+import re
+import json
+import time
 import asyncio
 import logging
 import base64
@@ -20,9 +23,17 @@ from typing import Optional
 
 import aiohttp
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # pragma: no cover - optional speedup
+    _json_loads = json.loads
+
 from src.storage.gift_history import GiftHistoryService, NFTTransfer, WalletUsername
+from src.storage.postgres import db
 from src.services.fragment_metadata import fragment_metadata
 from src.services.telegram_client import tg_client_manager
+from src.storage.redis_client import redis_client
 
 logger = logging.getLogger(__name__)
 
@@ -30,9 +41,28 @@ logger = logging.getLogger(__name__)
 TONAPI_SSE_URL = "https://tonapi.io/v2/sse"
 TONAPI_BASE = "https://tonapi.io/v2"
 
+# Per-request timeout for TonAPI REST calls (the SSE stream sets its own)
+_DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=5, connect=2)
+
+# NFT names look like "Gift Name – Collectible #12345"
+_NAME_SEP = "–"
+_SLUG_NUM_RE = re.compile(r"#?(\d+)")
+
+# SSE payload lines, matched on the raw bytes
+SSE_DATA_PREFIX = b"data: "
+
 # NFT Transfer opcode (TEP-62)
 NFT_TRANSFER_OPCODE = "0x5fcc3d14"
 
+# Max concurrent TonAPI requests (collection items, transactions)
+MAX_CONCURRENT_FETCHES = 8
+
+# SSE events are buffered and recorded in batches
+SSE_QUEUE_SIZE = 10_000
+SSE_BATCH_SIZE = 100
+SSE_BATCH_WINDOW = 0.2  # seconds
+SSE_WORKERS = 2  # concurrent batch workers
+
 
 def to_raw_address(user_friendly: str) -> str:
     """Convert user-friendly TON address to raw format (workchain:hex)."""
@@ -58,8 +88,16 @@ TELEGRAM_GIFT_COLLECTIONS_UF = [
     "EQCE80Aln8YfldnQLwWMvOfloLGgmPY0eGDJz9ufG3gRui3D",  # Loot Bags
 ]
 
-# Convert to raw format for TonAPI SSE
-TELEGRAM_GIFT_COLLECTIONS = [to_raw_address(addr) for addr in TELEGRAM_GIFT_COLLECTIONS_UF]
+# Raw format for TonAPI SSE (ordered, for subscriptions and fetches).
+# Precomputed with to_raw_address(); keep in sync with the list above.
+TELEGRAM_GIFT_COLLECTIONS_LIST = (
+    "0:06704fb694bc861dafa5b1a3fb4b58099617c6eaa149e8c9a42d4fb17a36c416",  # Telegram Gifts
+    "0:80d78a35f955a14b679faa887ff4cd5bfc0f43b4a4eea2a7e6927f3701b273c2",  # Star Gifts
+    "0:84f340259fc61f95d9d02f058cbce7e5a0b1a098f6347860c9cfdb9f1b7811ba",  # Loot Bags
+)
+
+# Set form for per-event membership checks
+TELEGRAM_GIFT_COLLECTIONS: frozenset[str] = frozenset(TELEGRAM_GIFT_COLLECTIONS_LIST)
 
 
 class GiftCollectorWorker:
@@ -73,11 +111,14 @@ class GiftCollectorWorker:
     """
 
     def __init__(self, db_session_factory):
-        self.db = GiftHistoryService(db_session_factory)
+        self.db = GiftHistoryService(db_session_factory, redis_client)
         self.api_key = os.getenv("TONAPI_KEY", "")
         self._session: Optional[aiohttp.ClientSession] = None
         self._running = False
         self._tasks: list[asyncio.Task] = []
+        self._fetch_semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+        self._event_queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=SSE_QUEUE_SIZE)
+        self._start_monotonic: Optional[float] = None
 
         # Stats
         self.stats = {
@@ -85,6 +126,8 @@ class GiftCollectorWorker:
             "wallets_linked": 0,
             "gifts_scanned": 0,
             "errors": 0,
+            "http_connections_created": 0,
+            "http_connections_reused": 0,
             "started_at": None,
         }
 
@@ -94,9 +137,35 @@ class GiftCollectorWorker:
             headers = {}
             if self.api_key:
                 headers["Authorization"] = f"Bearer {self.api_key}"
-            self._session = aiohttp.ClientSession(headers=headers)
+
+            # Keep TonAPI connections alive between bursts so requests skip
+            # the TCP/TLS handshake; the trace counts how often that works
+            connector = aiohttp.TCPConnector(
+                limit=64,
+                limit_per_host=32,
+                keepalive_timeout=60,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True,
+            )
+            trace = aiohttp.TraceConfig()
+            trace.on_connection_create_end.append(self._on_connection_created)
+            trace.on_connection_reuseconn.append(self._on_connection_reused)
+
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=headers,
+                trace_configs=[trace],
+            )
         return self._session
 
+    async def _on_connection_created(self, session, ctx, params):
+        """aiohttp trace hook: a new connection was opened."""
+        self.stats["http_connections_created"] += 1
+
+    async def _on_connection_reused(self, session, ctx, params):
+        """aiohttp trace hook: a pooled keep-alive connection was reused."""
+        self.stats["http_connections_reused"] += 1
+
     async def start(self):
         """Start the collector worker."""
         if self._running:
@@ -105,17 +174,20 @@ class GiftCollectorWorker:
 
         self._running = True
         self.stats["started_at"] = datetime.utcnow()
+        self._start_monotonic = time.monotonic()
 
         logger.info("🚀 Starting Gift Collector Worker...")
 
         # Start background tasks
         self._tasks = [
             asyncio.create_task(self._nft_transfer_collector()),
+            *(asyncio.create_task(self._sse_event_batcher()) for _ in range(SSE_WORKERS)),
             asyncio.create_task(self._metadata_enricher()),
             asyncio.create_task(self._stats_reporter()),
+            asyncio.create_task(self._metadata_cache_cleaner()),
         ]
 
-        logger.info("✅ Gift Collector Worker started with 3 background tasks")
+        logger.info(f"✅ Gift Collector Worker started with {len(self._tasks)} background tasks")
 
     async def stop(self):
         """Stop the collector worker."""
@@ -164,10 +236,10 @@ class GiftCollectorWorker:
         # Subscribe to NFT transfers for gift collections
         url = f"{TONAPI_SSE_URL}/accounts/transactions"
         params = {
-            "accounts": ",".join(TELEGRAM_GIFT_COLLECTIONS),
+            "accounts": ",".join(TELEGRAM_GIFT_COLLECTIONS_LIST),
         }
 
-        logger.info(f"Connecting to SSE stream for {len(TELEGRAM_GIFT_COLLECTIONS)} collections...")
+        logger.info(f"Connecting to SSE stream for {len(TELEGRAM_GIFT_COLLECTIONS_LIST)} collections...")
 
         # Use aiohttp.ClientTimeout with total=None for infinite streaming
         timeout = aiohttp.ClientTimeout(total=None, connect=30, sock_read=None)
@@ -183,23 +255,74 @@ class GiftCollectorWorker:
                 if not self._running:
                     break
 
-                line = line.decode("utf-8").strip()
-
-                # Skip empty lines and heartbeats
-                if not line or line.startswith(":"):
+                # Skip empty lines, heartbeats and other SSE fields
+                if not line.startswith(SSE_DATA_PREFIX):
                     continue
 
-                # Parse SSE event
-                if line.startswith("data: "):
+                # Hand the raw payload to the batch workers; parsing happens
+                # there so bursts don't stall reading the stream
+                try:
+                    self._event_queue.put_nowait(line[len(SSE_DATA_PREFIX):])
+                except asyncio.QueueFull:
+                    self.stats["errors"] += 1
+                    logger.warning("SSE event queue full, dropping event")
+
+    async def _sse_event_batcher(self):
+        """
+        Task 2: Record SSE transfer events in batches.
+
+        Waits for an event, keeps collecting for up to SSE_BATCH_WINDOW
+        seconds (or SSE_BATCH_SIZE events), then fetches the transactions
+        concurrently and records them in one bulk insert. SSE_WORKERS copies
+        run side by side, each taking its own batches from the queue.
+        """
+        loop = asyncio.get_running_loop()
+
+        while self._running:
+            try:
+                batch = [await self._event_queue.get()]
+                deadline = loop.time() + SSE_BATCH_WINDOW
+
+                while len(batch) < SSE_BATCH_SIZE:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
                     try:
-                        import json
-                        data = json.loads(line[6:])
-                        await self._process_sse_event(data)
-                    except Exception as e:
-                        logger.debug(f"Error processing SSE event: {e}")
-
-    async def _process_sse_event(self, data: dict):
-        """Process a single SSE event and store in database."""
+                        batch.append(await asyncio.wait_for(self._event_queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+
+                await self._process_sse_batch(batch)
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"SSE batch error: {e}")
+
+    async def _process_sse_batch(self, payloads: list[bytes]):
+        """Parse a batch of raw SSE payloads, fetch their transactions and store them."""
+        events = []
+        for payload in payloads:
+            try:
+                # JSON ignores the trailing newline left on the payload
+                events.append(_json_loads(payload))
+            except Exception as e:
+                logger.debug(f"Invalid JSON in SSE event: {e}")
+
+        results = await asyncio.gather(
+            *(self._fetch_transfer(data) for data in events),
+            return_exceptions=True,
+        )
+        rows = [row for row in results if isinstance(row, dict)]
+
+        recorded = await self.db.record_transfers_bulk(rows)
+        if recorded:
+            self.stats["nft_transfers_collected"] += recorded
+            logger.debug(f"Recorded {recorded}/{len(events)} NFT transfers")
+
+    async def _fetch_transfer(self, data: dict) -> Optional[dict]:
+        """Fetch the transaction for an SSE event as a record_transfer()-style row."""
         try:
             account_id = data.get("account_id", "")
             tx_hash = data.get("tx_hash", "")
@@ -209,11 +332,12 @@ class GiftCollectorWorker:
             session = await self._get_session()
             url = f"{TONAPI_BASE}/blockchain/transactions/{tx_hash}"
 
-            async with session.get(url) as resp:
-                if resp.status != 200:
-                    return
+            async with self._fetch_semaphore:
+                async with session.get(url, timeout=_DEFAULT_TIMEOUT) as resp:
+                    if resp.status != 200:
+                        return None
 
-                tx_data = await resp.json()
+                    tx_data = await resp.json()
 
             # Parse the transaction for NFT transfer details
             in_msg = tx_data.get("in_msg", {})
@@ -226,27 +350,23 @@ class GiftCollectorWorker:
             decoded = in_msg.get("decoded_body", {})
             nft_address = decoded.get("new_owner", dest)
 
-            # Record the transfer
-            recorded = await self.db.record_transfer(
-                tx_hash=tx_hash,
-                nft_address=account_id,  # The collection/NFT that triggered
-                from_address=source,
-                to_address=dest,
-                block_timestamp=datetime.fromtimestamp(tx_data.get("utime", 0)),
-                collection_address=account_id,
-                is_telegram_gift=account_id in TELEGRAM_GIFT_COLLECTIONS
-            )
-
-            if recorded:
-                self.stats["nft_transfers_collected"] += 1
-                logger.debug(f"Recorded NFT transfer: {tx_hash[:16]}...")
+            return {
+                "tx_hash": tx_hash,
+                "nft_address": account_id,  # The collection/NFT that triggered
+                "from_address": source,
+                "to_address": dest,
+                "block_timestamp": datetime.fromtimestamp(tx_data.get("utime", 0)),
+                "collection_address": account_id,
+                "is_telegram_gift": account_id in TELEGRAM_GIFT_COLLECTIONS,
+            }
 
         except Exception as e:
             logger.debug(f"Error processing event: {e}")
+            return None
 
     async def _metadata_enricher(self):
         """
-        Task 2: Enrich NFT records with metadata from Fragment.
+        Task 3: Enrich NFT records with metadata from Fragment.
 
         Periodically fetches metadata for NFTs to extract:
         - Sender username/ID
@@ -269,31 +389,68 @@ class GiftCollectorWorker:
             # Run every 5 minutes
             await asyncio.sleep(300)
 
-    async def _enrich_recent_nfts(self):
-        """Fetch and process metadata for recent NFT transfers."""
+    async def _fetch_collection_items(self, collection: str) -> list[dict]:
+        """Fetch the latest NFT items of a gift collection from TonAPI."""
         session = await self._get_session()
+        url = f"{TONAPI_BASE}/nfts/collections/{collection}/items"
+        params = {"limit": 100}
 
-        # Get recent NFT items from gift collections
-        for collection in TELEGRAM_GIFT_COLLECTIONS:
-            try:
-                url = f"{TONAPI_BASE}/nfts/collections/{collection}/items"
-                params = {"limit": 100}
-
-                async with session.get(url, params=params) as resp:
-                    if resp.status != 200:
-                        continue
+        async with self._fetch_semaphore:
+            async with session.get(url, params=params, timeout=_DEFAULT_TIMEOUT) as resp:
+                if resp.status != 200:
+                    return []
 
-                    data = await resp.json()
-                    items = data.get("nft_items", [])
+                data = await resp.json()
+                return data.get("nft_items", [])
 
-                for item in items:
-                    await self._process_nft_metadata(item)
+    async def _enrich_recent_nfts(self):
+        """Fetch and process metadata for recent NFT transfers."""
+        # Rows are collected across all collections and written in bulk
+        wallet_rows: list[dict] = []
+        # Keyed by slug so the bulk upsert never sees the same slug twice
+        metadata_rows: dict[str, dict] = {}
+
+        # Get recent NFT items from all gift collections concurrently
+        results = await asyncio.gather(
+            *(self._fetch_collection_items(c) for c in TELEGRAM_GIFT_COLLECTIONS_LIST),
+            return_exceptions=True,
+        )
+
+        for collection, items in zip(TELEGRAM_GIFT_COLLECTIONS_LIST, results):
+            if isinstance(items, Exception):
+                logger.debug(f"Error enriching collection {collection[:20]}: {items}")
+                continue
+
+            for item in items:
+                rows = await self._process_nft_metadata(item)
+                if rows:
+                    wallet_row, metadata_row = rows
+                    if wallet_row:
+                        wallet_rows.append(wallet_row)
+                    metadata_rows[metadata_row["slug"]] = metadata_row
+
+        if wallet_rows:
+            linked = await self.db.link_wallets_bulk(wallet_rows)
+            self.stats["wallets_linked"] += linked
+            if linked:
+                logger.info(f"Linked {linked} wallets from NFT metadata")
+
+        if metadata_rows:
+            if await self.db.cache_gift_metadata_bulk(list(metadata_rows.values())):
+                self.stats["gifts_scanned"] += len(metadata_rows)
+            else:
+                self.stats["errors"] += 1
+                logger.warning(f"Failed to cache metadata for {len(metadata_rows)} gifts")
 
-            except Exception as e:
-                logger.debug(f"Error enriching collection {collection[:20]}: {e}")
+    async def _process_nft_metadata(self, item: dict) -> Optional[tuple[Optional[dict], dict]]:
+        """
+        Process NFT item metadata to extract user connections.
 
-    async def _process_nft_metadata(self, item: dict):
-        """Process NFT item metadata to extract user connections."""
+        Returns:
+            (wallet_row, metadata_row) for link_wallets_bulk() and
+            cache_gift_metadata_bulk(), or None if there is nothing to store.
+            wallet_row is None when the recipient is unknown.
+        """
         try:
             nft_address = item.get("address", "")
             owner_address = item.get("owner", {}).get("address", "")
@@ -305,25 +462,28 @@ class GiftCollectorWorker:
             # Try to extract slug for Fragment lookup
             # Format: "Gift Name – Collectible #12345" or similar
             slug = None
-            if "–" in name:
+            if _NAME_SEP in name:
                 # Extract model and number
-                parts = name.split("–")
+                parts = name.split(_NAME_SEP)
                 if len(parts) >= 2:
                     model_part = parts[0].strip().lower().replace(" ", "-")
                     number_part = parts[1].strip()
                     # Extract number
-                    import re
-                    match = re.search(r'#?(\d+)', number_part)
+                    match = _SLUG_NUM_RE.search(number_part)
                     if match:
                         slug = f"{model_part}-{match.group(1)}"
 
             if not slug:
-                return
+                return None
+
+            # Skip slugs whose cached metadata hasn't expired yet
+            if await self.db.is_gift_metadata_fresh(slug):
+                return None
 
             # Fetch full metadata from Fragment
             fragment_meta = await fragment_metadata.get_metadata(slug)
             if not fragment_meta:
-                return
+                return None
 
             # Extract sender/recipient info
             if fragment_meta.original_details:
@@ -336,45 +496,66 @@ class GiftCollectorWorker:
                     pass
 
                 # Link recipient wallet (current owner likely is or was recipient)
-                if od.recipient_username:
-                    await self.db.link_wallet_username(
-                        wallet_address=owner_address,
-                        username=od.recipient_username,
-                        user_id=od.recipient_id,
-                        source="fragment_nft"
-                    )
-                    self.stats["wallets_linked"] += 1
-                    logger.info(f"Linked wallet {owner_address[:20]}... to @{od.recipient_username}")
+                wallet_row = None
+                if od.recipient_username and owner_address:
+                    wallet_row = {
+                        "wallet_address": owner_address,
+                        "username": od.recipient_username,
+                        "user_id": od.recipient_id,
+                        "source": "fragment_nft",
+                    }
+                    logger.debug(f"Linking wallet {owner_address[:20]}... to @{od.recipient_username}")
 
                 # Cache the gift metadata
-                await self.db.cache_gift_metadata(
-                    slug=slug,
-                    name=fragment_meta.name,
-                    model=fragment_meta.model,
-                    backdrop=fragment_meta.backdrop,
-                    symbol=fragment_meta.symbol,
-                    sender_id=od.sender_id,
-                    sender_username=od.sender_username,
-                    recipient_id=od.recipient_id,
-                    recipient_username=od.recipient_username,
-                    image_url=fragment_meta.image_url,
-                    transfer_date=od.transfer_date,
-                    original_message=od.original_message
-                )
-                self.stats["gifts_scanned"] += 1
+                metadata_row = {
+                    "slug": slug,
+                    "name": fragment_meta.name,
+                    "model": fragment_meta.model,
+                    "backdrop": fragment_meta.backdrop,
+                    "symbol": fragment_meta.symbol,
+                    "sender_id": od.sender_id,
+                    "sender_username": od.sender_username,
+                    "recipient_id": od.recipient_id,
+                    "recipient_username": od.recipient_username,
+                    "image_url": fragment_meta.image_url,
+                    "transfer_date": od.transfer_date,
+                    "original_message": od.original_message,
+                }
+                return wallet_row, metadata_row
 
         except Exception as e:
             logger.debug(f"Error processing NFT metadata: {e}")
 
+        return None
+
+    async def _metadata_cache_cleaner(self):
+        """Task 5: Hourly purge of expired gift metadata rows."""
+        while self._running:
+            await asyncio.sleep(3600)
+
+            if not self._running:
+                break
+
+            try:
+                deleted = await self.db.purge_expired_gift_metadata()
+                if deleted:
+                    logger.info(f"🧹 Purged {deleted} expired gift metadata rows")
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Metadata cache cleaner error: {e}")
+
     async def _stats_reporter(self):
-        """Task 3: Periodically report collection stats."""
+        """Task 4: Periodically report collection stats."""
         while self._running:
             await asyncio.sleep(600)  # Every 10 minutes
 
             if not self._running:
                 break
 
-            uptime = datetime.utcnow() - self.stats["started_at"] if self.stats["started_at"] else timedelta(0)
+            uptime_sec = time.monotonic() - self._start_monotonic if self._start_monotonic else 0
+            uptime = timedelta(seconds=int(uptime_sec))
+            pool = db.get_pool_stats()
+            pool_line = ", ".join(f"{k}={v}" for k, v in pool.items()) or "n/a"
 
             logger.info(
                 f"📊 Gift Collector Stats:\n"
@@ -382,6 +563,9 @@ class GiftCollectorWorker:
                 f"   NFT transfers: {self.stats['nft_transfers_collected']}\n"
                 f"   Wallets linked: {self.stats['wallets_linked']}\n"
                 f"   Gifts scanned: {self.stats['gifts_scanned']}\n"
+                f"   HTTP connections: {self.stats['http_connections_created']} new, "
+                f"{self.stats['http_connections_reused']} reused\n"
+                f"   DB pool: {pool_line}\n"
                 f"   Errors: {self.stats['errors']}"
             )
 
@@ -0,0 +1,8 @@
+"""Shared test setup."""
+
+import os
+
+# src.config builds Settings at import time; give the required API
+# credentials placeholder values so modules import without a .env
+os.environ.setdefault("SWIFT_GIFTS_API_KEY", "test")
+os.environ.setdefault("TONNEL_AUTH_DATA", "test")
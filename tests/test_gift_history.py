@@ -0,0 +1,131 @@
+"""Tests for GiftHistoryService queries and bulk writes."""
+
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.storage.gift_history import GiftHistoryService
+
+
+class FakeResult:
+    """Result whose mappings() yields canned rows."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def mappings(self):
+        return self.rows
+
+
+class FakeSession:
+    """Records statements instead of sending them to Postgres."""
+
+    def __init__(self, rows=()):
+        self.statements = []
+        self.rows = list(rows)
+
+    @asynccontextmanager
+    async def begin(self):
+        yield
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return FakeResult(self.rows)
+
+
+def make_factory(session: FakeSession):
+    @asynccontextmanager
+    async def factory():
+        yield session
+
+    return factory
+
+
+def bound_values(stmt, prefix: str) -> list:
+    """Values bound for one column across all rows of a multi-row INSERT."""
+    params = stmt.compile(dialect=postgresql.dialect()).params
+    return [value for key, value in params.items() if key.split("_m")[0] == prefix]
+
+
+@pytest.mark.asyncio
+async def test_cache_gift_metadata_bulk_dedupes_slugs():
+    session = FakeSession()
+    service = GiftHistoryService(make_factory(session))
+
+    ok = await service.cache_gift_metadata_bulk([
+        {"slug": "PlushPepe-1", "name": "first"},
+        {"slug": "DurovsCap-2", "name": "cap"},
+        {"slug": "PlushPepe-1", "name": "second"},
+    ])
+
+    assert ok is True
+    assert len(session.statements) == 1
+    stmt = session.statements[0]
+    assert sorted(bound_values(stmt, "slug")) == ["DurovsCap-2", "PlushPepe-1"]
+    assert sorted(bound_values(stmt, "name")) == ["cap", "second"]
+
+
+@pytest.mark.asyncio
+async def test_cache_gift_metadata_bulk_empty():
+    session = FakeSession()
+    service = GiftHistoryService(make_factory(session))
+
+    assert await service.cache_gift_metadata_bulk([]) is True
+    assert session.statements == []
+
+
+def compiled_sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_get_transfers_by_wallet_keyset_cursor():
+    ts = datetime(2026, 1, 1, 12, 0, 0)
+    rows = [
+        {"id": 42, "block_timestamp": ts},
+        {"id": 41, "block_timestamp": ts},
+    ]
+    session = FakeSession(rows)
+    service = GiftHistoryService(make_factory(session))
+
+    transfers, next_cursor = await service.get_transfers_by_wallet(
+        "EQwallet", limit=2, before_ts=ts, before_id=50
+    )
+
+    assert transfers == rows
+    assert next_cursor == (ts, 41)
+    sql = compiled_sql(session.statements[0])
+    assert "(nft_transfers.block_timestamp, nft_transfers.id) <" in sql
+    assert "block_timestamp DESC, " in sql and "id DESC" in sql
+
+
+@pytest.mark.asyncio
+async def test_get_transfers_by_wallet_last_page_has_no_cursor():
+    session = FakeSession([{"id": 7, "block_timestamp": datetime(2026, 1, 1)}])
+    service = GiftHistoryService(make_factory(session))
+
+    transfers, next_cursor = await service.get_transfers_by_wallet("EQwallet", limit=10)
+
+    assert len(transfers) == 1
+    assert next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_get_user_gift_activity_orders_union_and_splits_roles():
+    rows = [
+        {"slug": "DurovsCap-2", "role": "received"},
+        {"slug": "PlushPepe-1", "role": "sent"},
+    ]
+    session = FakeSession(rows)
+    service = GiftHistoryService(make_factory(session))
+
+    activity = await service.get_user_gift_activity(user_id=1)
+
+    assert activity == {
+        "sent": [{"slug": "PlushPepe-1"}],
+        "received": [{"slug": "DurovsCap-2"}],
+    }
+    sql = compiled_sql(session.statements[0])
+    assert sql.rstrip().endswith("ORDER BY anon_1.role, anon_1.transfer_date DESC")
@@ -0,0 +1,151 @@
+"""Tests for ListingsRepository on a bare asyncpg pool (no SQLAlchemy session)."""
+
+from contextlib import asynccontextmanager
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from src.storage.repositories.listings import ListingsRepository
+
+
+class Row(tuple):
+    """Tuple row that can also be indexed by column name, like asyncpg.Record."""
+
+    columns = {"price": 6, "total": 12}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = self.columns[key]
+        return super().__getitem__(key)
+
+
+def listing_row(gift_id: str, price: str) -> tuple:
+    """An active_listings row in ActiveListing.from_row order."""
+    now = datetime(2026, 1, 1)
+    return (
+        gift_id, "Plush Pepe", "Pepe", "Black", "Dots", 1,
+        Decimal(price), now, None, "tonnel", None, now,
+    )
+
+
+class FakeConnection:
+    """Pooled connection that serves one canned result set through a cursor."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.transactions = 0
+        self.cursors = []
+
+    @asynccontextmanager
+    async def transaction(self):
+        self.transactions += 1
+        yield
+
+    async def cursor(self, sql, *params, prefetch=None):
+        self.cursors.append((sql, params, prefetch))
+        for row in self.rows:
+            yield row
+
+
+class FakePool:
+    """Records queries and returns canned results."""
+
+    def __init__(self, rows=(), value=None):
+        self.rows = list(rows)
+        self.value = value
+        self.queries = []
+        self.conn = FakeConnection(self.rows)
+
+    async def fetch(self, sql, *params):
+        self.queries.append((sql, params))
+        return self.rows
+
+    async def fetchval(self, sql, *params):
+        self.queries.append((sql, params))
+        return self.value
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+def test_requires_session_or_pool():
+    with pytest.raises(ValueError):
+        ListingsRepository()
+
+
+@pytest.mark.asyncio
+async def test_remove_listing_on_pool():
+    pool = FakePool(value="Pepe")
+    repo = ListingsRepository(pool=pool)
+
+    await repo.remove_listing("gift-1")
+
+    sql, params = pool.queries[0]
+    assert sql.startswith("DELETE FROM active_listings")
+    assert params == ("gift-1",)
+
+
+@pytest.mark.asyncio
+async def test_get_listings_for_asset_on_pool():
+    pool = FakePool(rows=[listing_row("gift-1", "10.5"), listing_row("gift-2", "12")])
+    repo = ListingsRepository(pool=pool)
+
+    listings = await repo.get_listings_for_asset("Pepe", "Black")
+
+    assert [listing.gift_id for listing in listings] == ["gift-1", "gift-2"]
+    assert listings[0].price == Decimal("10.5")
+    assert pool.queries[0][1] == ("Pepe", "Black")
+
+
+@pytest.mark.asyncio
+async def test_iter_listings_for_asset_on_pool():
+    pool = FakePool(rows=[listing_row("gift-1", "10.5"), listing_row("gift-2", "12")])
+    repo = ListingsRepository(pool=pool)
+
+    listings = [listing async for listing in repo.iter_listings_for_asset("Pepe")]
+
+    assert [listing.gift_id for listing in listings] == ["gift-1", "gift-2"]
+    assert pool.conn.transactions == 1
+    assert pool.conn.cursors[0][1] == ("Pepe",)
+
+
+@pytest.mark.asyncio
+async def test_get_market_snapshot_on_pool():
+    pool = FakePool(rows=[
+        Row((*listing_row("gift-1", "10.5"), 3)),
+        Row((*listing_row("gift-2", "12"), 3)),
+    ])
+    repo = ListingsRepository(pool=pool)
+
+    snapshot = await repo.get_market_snapshot("Pepe")
+
+    assert snapshot["count"] == 3
+    assert snapshot["floors"]["first"] == Decimal("10.5")
+    assert snapshot["floors"]["second"] == Decimal("12")
+    assert [listing.gift_id for listing in snapshot["top"]] == ["gift-1", "gift-2"]
+
+
+@pytest.mark.asyncio
+async def test_count_listings_on_pool():
+    pool = FakePool(value=7)
+    repo = ListingsRepository(pool=pool)
+
+    assert await repo.count_listings("Pepe", "") == 7
+    sql, params = pool.queries[0]
+    assert "backdrop IS NULL" in sql
+    assert params == ("Pepe",)
+
+
+@pytest.mark.asyncio
+async def test_get_floors_on_pool():
+    pool = FakePool(rows=[(Decimal("10.5"),), (Decimal("12"),)])
+    repo = ListingsRepository(pool=pool)
+
+    floors = await repo.get_floors("Pepe")
+
+    assert floors == {
+        "first": Decimal("10.5"), "second": Decimal("12"), "third": None, "count": 2,
+    }
+